@@ -0,0 +1,73 @@
+import pandas as pd
+
+# Match stat column -> name used in the match context table
+ENTITY_STATS = {"score": "Score", "kills": "Kills", "damage": "Damage", "goldSpent": "Gold"}
+
+
+def match_entities(match_df, player_name):
+    """Totals and averages per entity of one match, in the order shown in the match context table.
+
+    A single groupby over (team, player) gives every player's row count and
+    stat sums, so a name read on both teams (e.g. two unreadable names, stored
+    as "") counts once per team. Teammates and opponents are aliased by their
+    position in the sorted player names of their team, and the Teammates /
+    Team / Opponents rows are sums of the per-player sums of their team.
+    Averages are per scoreboard row, as before.
+    """
+    stats = list(ENTITY_STATS)
+    per_player = match_df.groupby(["team", "player"], sort=True).agg(
+        rows=("team", "size"), **{stat: (stat, "sum") for stat in stats}
+    )
+    teams = per_player.index.get_level_values("team")
+    players = per_player.index.get_level_values("player")
+    # If the player is not in this match, assume Team 1
+    player_teams = teams[players == player_name]
+    player_team = player_teams[0] if len(player_teams) else "Team 1"
+    on_team = (teams == player_team)
+    is_player = on_team & (players == player_name)
+
+    sums = per_player[["rows", *stats]]
+    teammates = sums[on_team & ~is_player]
+    opponents = sums[~on_team]
+    player = sums[is_player].sum()
+
+    names = [player_name]
+    names += [f"Teammate {i}" for i in range(1, len(teammates) + 1)]
+    names += [f"Opponent {i}" for i in range(1, len(opponents) + 1)]
+    parts = [player.to_frame().T, teammates, opponents]
+    if not teammates.empty:
+        names.append("Teammates")
+        parts.append(teammates.sum().to_frame().T)
+    names += ["Team", "Opponents"]
+    parts += [sums[on_team].sum().to_frame().T, opponents.sum().to_frame().T]
+
+    totals = pd.concat(parts, ignore_index=True)
+    totals.index = names
+    rows = totals["rows"].astype("float64")
+    entities = pd.DataFrame(index=totals.index)
+    for stat, label in ENTITY_STATS.items():
+        entities[f"Total {label}"] = totals[stat].to_numpy()
+        entities[f"Avg {label}"] = (totals[stat] / rows.where(rows > 0)).to_numpy()
+    return entities
+
+
+def lifetime_columns(totals):
+    """Headers, columns and formats of the lifetime table from the per-player running totals."""
+    games = totals["rows"].to_numpy()
+    headers = ["Player", "GamesPlayed", "Wins", "Losses", "TotalScore", "AvgScore", "TotalKills", "AvgKills",
+               "TotalDamage", "AvgDamage", "TotalGold", "AvgGold"]
+    columns = [totals["player"].to_numpy(dtype=object), totals["games"].to_numpy(),
+               totals["wins"].to_numpy(), totals["losses"].to_numpy()]
+    formats = [None, None, None, None]
+    for stat in ["score", "kills", "damage", "goldSpent"]:
+        total = totals[stat].to_numpy()
+        columns += [total, total / games]
+        formats += [None, "{:.2f}"]
+    return headers, columns, formats
+
+
+def chart_series(entities, player_name):
+    """(player, team, opponents) average score of one match for the chart, or None."""
+    if entities is None or not all(name in entities.index for name in (player_name, "Team", "Opponents")):
+        return None
+    return tuple(float(entities.at[name, "Avg Score"]) for name in (player_name, "Team", "Opponents"))
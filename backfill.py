@@ -0,0 +1,152 @@
+import os
+import csv
+import time
+import argparse
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+import utils
+from main import process_image, DATA_FOLDER
+from utils import load_config, save_match_rows, frame_rows, build_glyph_atlas
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+MANIFEST_FILE = os.path.join(DATA_FOLDER, "backfill_manifest.csv")
+SCRATCH_FOLDER = os.path.join(DATA_FOLDER, "backfill_scratch")
+
+# Set in each worker process by _init_worker
+_player_name = None
+_scratch_folder = None
+_config = None
+
+
+def find_screenshots(folder, recursive=False):
+    if recursive:
+        paths = [
+            os.path.join(root, name)
+            for root, _, names in os.walk(folder)
+            for name in names
+        ]
+    else:
+        paths = [os.path.join(folder, name) for name in os.listdir(folder)]
+    return sorted(os.path.abspath(path) for path in paths if path.lower().endswith(IMAGE_EXTENSIONS))
+
+
+def load_manifest(manifest_file=MANIFEST_FILE):
+    """Paths already handled by earlier runs (imported or found to contain no scoreboard)."""
+    if not os.path.exists(manifest_file):
+        return set()
+    with open(manifest_file, newline="") as file:
+        return {row["path"] for row in csv.DictReader(file)}
+
+
+def append_manifest(entries, manifest_file=MANIFEST_FILE):
+    new_file = not os.path.exists(manifest_file)
+    with open(manifest_file, mode="a", newline="") as file:
+        writer = csv.writer(file)
+        if new_file:
+            writer.writerow(["path", "status", "uuid"])
+        writer.writerows(entries)
+
+
+def _init_worker(player_name, scratch_root, debug_artifacts):
+    global _player_name, _scratch_folder, _config
+    _player_name = player_name
+    # Each worker gets its own session folder so nobody clears another worker's files
+    _scratch_folder = os.path.join(scratch_root, f"worker_{os.getpid()}")
+    _config = load_config()
+    # Parallelism comes from the process pool. The OCR cache file is shared, so workers leave it alone.
+    _config.update(max_workers=1, ocr_cache=False, debug_artifacts=debug_artifacts)
+
+
+def _process_file(path):
+    captured_at = datetime.fromtimestamp(os.path.getmtime(path))
+    result = process_image(path, _player_name, _scratch_folder, captured_at, aggregate=False, config=_config)
+    if result is None:
+        return path, "no_scoreboard", "", None, None, None
+    if result.duplicate:
+        return path, "duplicate", result.uuid, None, None, None
+    # Read as text so the aggregate files get exactly what the session files contain
+    player_data = pd.read_csv(os.path.join(_scratch_folder, "output.csv"), dtype=str, keep_default_na=False)
+    middle_control = pd.read_csv(os.path.join(_scratch_folder, "middle_control.csv"), dtype=str, keep_default_na=False)
+    return path, "imported", result.uuid, player_data, middle_control, {result.uuid: result.image_hash}
+
+
+def flush(pending, manifest_entries):
+    """Write the buffered matches to the store and aggregate files, then mark their files as done."""
+    if pending:
+        image_hashes = {}
+        for _, _, hashes in pending:
+            image_hashes.update(hashes)
+        # Screenshots of a match that is already stored (or appears twice in this batch) are skipped here
+        save_match_rows(
+            *frame_rows(pd.concat([player_data for player_data, _, _ in pending], ignore_index=True)),
+            *frame_rows(pd.concat([middle_control for _, middle_control, _ in pending], ignore_index=True)),
+            image_hashes,
+        )
+    if manifest_entries:
+        append_manifest(manifest_entries)
+    pending.clear()
+    manifest_entries.clear()
+
+
+def backfill(folder, player_name, workers=None, recursive=False, flush_every=50, debug_artifacts="off"):
+    done = load_manifest()
+    paths = [path for path in find_screenshots(folder, recursive) if path not in done]
+    print(f"{len(paths)} screenshots to import ({len(done)} already in the manifest).")
+    if not paths:
+        return
+
+    # Learn from the last live capture once here, before the workers load the atlas read-only
+    build_glyph_atlas()
+
+    pending = []
+    manifest_entries = []
+    imported = 0
+    started = time.perf_counter()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(player_name, SCRATCH_FOLDER, debug_artifacts),
+    ) as executor:
+        futures = [executor.submit(_process_file, path) for path in paths]
+        for completed, future in enumerate(as_completed(futures), start=1):
+            try:
+                path, status, session_uuid, player_data, middle_control, image_hashes = future.result()
+            except Exception as e:
+                # Not added to the manifest, so the file is retried on the next run
+                print(f"Failed to import a screenshot: {e}")
+                continue
+            if player_data is not None:
+                pending.append((player_data, middle_control, image_hashes))
+                imported += 1
+            manifest_entries.append([path, status, session_uuid])
+            if len(manifest_entries) >= flush_every:
+                flush(pending, manifest_entries)
+
+            rate = completed / (time.perf_counter() - started)
+            print(f"[{completed}/{len(paths)}] {rate:.2f} images/sec - {status}: {os.path.basename(path)}")
+    flush(pending, manifest_entries)
+
+    elapsed = time.perf_counter() - started
+    print(f"Imported {imported} of {len(paths)} screenshots in {elapsed:.1f}s ({len(paths) / elapsed:.2f} images/sec).")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import a folder of saved scoreboard screenshots.")
+    parser.add_argument("folder", help="Folder containing the screenshots")
+    parser.add_argument("--player", help="Player name used to assign Victory/Defeat (default: from config.json)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per core)")
+    parser.add_argument("--recursive", action="store_true", help="Also scan sub-folders")
+    parser.add_argument("--flush-every", type=int, default=50, help="Screenshots per bulk write to the aggregate files")
+    parser.add_argument("--debug-artifacts", choices=utils.DEBUG_ARTIFACT_MODES, default="off",
+                        help="Debug images to keep in each worker's scratch folder")
+    args = parser.parse_args()
+
+    player_name = args.player or load_config().get("player_name", "Default Player")
+    backfill(args.folder, player_name, args.workers, args.recursive, args.flush_every, args.debug_artifacts)
+
+
+if __name__ == "__main__":
+    main()
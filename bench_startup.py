@@ -0,0 +1,89 @@
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+# Modules the first window must not wait for; they load on first capture or when the Analytics tab opens
+DEFERRED_MODULES = ["cv2", "pytesseract", "pyautogui", "mss", "pyarrow", "utils", "capture", "main", "PyQt6.QtCharts"]
+
+
+def _child():
+    """Runs in a fresh interpreter: time `import gui` and the first painted window, then exit."""
+    started = time.perf_counter()
+    import gui
+    imported = time.perf_counter()
+
+    from PyQt6.QtWidgets import QApplication
+    from PyQt6.QtCore import QTimer
+
+    app = QApplication(sys.argv)
+    window = gui.GameStatsApp()
+    window.show()
+    # Checked before the event loop starts the background loading
+    result = {"loaded_deferred_modules": [name for name in DEFERRED_MODULES if name in sys.modules]}
+
+    def first_paint():
+        # Runs once the event loop has processed the show and the first paint
+        result["import_seconds"] = imported - started
+        result["window_seconds"] = time.perf_counter() - started
+        app.quit()
+
+    QTimer.singleShot(0, first_paint)
+    app.exec()
+    print(json.dumps(result))
+
+
+def measure(runs, offscreen=False):
+    env = dict(os.environ)
+    if offscreen:
+        env["QT_QPA_PLATFORM"] = "offscreen"
+    results = []
+    for run in range(runs):
+        started = time.perf_counter()
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child"],
+            capture_output=True, text=True, env=env, cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+        wall = time.perf_counter() - started
+        if output.returncode != 0:
+            raise RuntimeError(f"Startup run failed:\n{output.stderr}")
+        # The GUI prints progress; the measurement is the last line
+        result = json.loads(output.stdout.strip().splitlines()[-1])
+        result["process_seconds"] = wall
+        results.append(result)
+        print(f"Run {run + 1}: import {result['import_seconds']:.3f}s, "
+              f"window {result['window_seconds']:.3f}s, process {wall:.3f}s")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure how long the GUI takes to import and show its window.")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to start (default: 5)")
+    parser.add_argument("--offscreen", action="store_true", help="Use Qt's offscreen platform (no display needed)")
+    parser.add_argument("--max-window-seconds", type=float, default=None,
+                        help="Exit with an error if the median time to the first window is above this")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child()
+        return
+
+    results = measure(args.runs, args.offscreen)
+    window_median = statistics.median(result["window_seconds"] for result in results)
+    import_median = statistics.median(result["import_seconds"] for result in results)
+    print(f"Median: import {import_median:.3f}s, window {window_median:.3f}s")
+
+    loaded = sorted({name for result in results for name in result["loaded_deferred_modules"]})
+    if loaded:
+        print(f"Loaded before the first window: {', '.join(loaded)}")
+    if args.max_window_seconds is not None and window_median > args.max_window_seconds:
+        print(f"Startup regression: {window_median:.3f}s is above {args.max_window_seconds:.3f}s")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+import os
+import glob
+import threading
+import time
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+from utils import match_template_near, last_anchor, remember_anchor, downsample_gray
+
+# The scoreboard spans this fraction of the screen from the anchor's top-left corner
+SCOREBOARD_HEIGHT_RATIO = 915 / 1440
+SCOREBOARD_WIDTH_RATIO = 1665 / 2560
+# Extra pixels grabbed around the expected scoreboard so a small shift is still found
+ANCHOR_REGION_MARGIN = 8
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+ScoreboardCapture = namedtuple("ScoreboardCapture", ["frame", "board", "top_left", "score"])
+
+
+def scoreboard_size(frame_size):
+    """(width, height) of the scoreboard crop for a screen of `frame_size` (width, height)."""
+    width, height = frame_size
+    return int(SCOREBOARD_WIDTH_RATIO * width), int(SCOREBOARD_HEIGHT_RATIO * height)
+
+
+class CaptureBackend:
+    """Source of screen frames as NumPy arrays.
+
+    `grab(region)` returns a BGR frame (or grayscale with `grayscale=True`) of
+    the whole screen, or of `region` = (left, top, width, height) only.
+    `frame_size` is the (width, height) of the last full-screen grab.
+    """
+
+    name = "base"
+
+    def __init__(self):
+        self.frame_size = None
+
+    def grab(self, region=None, grayscale=False):
+        frame = self._grab(region, grayscale)
+        if region is None:
+            self.frame_size = (frame.shape[1], frame.shape[0])
+        return frame
+
+    def _grab(self, region, grayscale):
+        raise NotImplementedError
+
+
+class MssBackend(CaptureBackend):
+    """Grabs through `mss`, reading straight from its BGRA frame buffer."""
+
+    name = "mss"
+
+    def __init__(self):
+        super().__init__()
+        import mss
+        self._mss = mss
+        # mss handles are not shareable between threads
+        self._local = threading.local()
+
+    def _grab(self, region, grayscale):
+        if not hasattr(self._local, "sct"):
+            self._local.sct = self._mss.mss()
+        sct = self._local.sct
+        if region is None:
+            monitor = sct.monitors[1]
+        else:
+            left, top, width, height = region
+            primary = sct.monitors[1]
+            monitor = {"left": primary["left"] + left, "top": primary["top"] + top, "width": width, "height": height}
+        shot = sct.grab(monitor)
+        # View over mss's buffer; the colour conversion below is the only copy
+        bgra = np.frombuffer(shot.raw, dtype=np.uint8).reshape(shot.height, shot.width, 4)
+        return cv2.cvtColor(bgra, cv2.COLOR_BGRA2GRAY if grayscale else cv2.COLOR_BGRA2BGR)
+
+
+class PyAutoGuiBackend(CaptureBackend):
+    """Grabs through `pyautogui`, which hands back a PIL image."""
+
+    name = "pyautogui"
+
+    def __init__(self):
+        super().__init__()
+        import pyautogui
+        self._pyautogui = pyautogui
+
+    def _grab(self, region, grayscale):
+        image = self._pyautogui.screenshot(region=region)
+        return cv2.cvtColor(np.asarray(image), cv2.COLOR_RGB2GRAY if grayscale else cv2.COLOR_RGB2BGR)
+
+
+class FileBackend(CaptureBackend):
+    """Serves saved screenshots as if they were the screen, for testing without a display.
+
+    `source` is an image file or a folder of images. The current image is
+    served until `advance()` moves on to the next one.
+    """
+
+    name = "file"
+
+    def __init__(self, source):
+        super().__init__()
+        if os.path.isdir(source):
+            self.paths = sorted(
+                path for path in glob.glob(os.path.join(source, "*"))
+                if path.lower().endswith(IMAGE_EXTENSIONS)
+            )
+        else:
+            self.paths = [source]
+        if not self.paths:
+            raise FileNotFoundError(f"No images found for the file capture backend: {source}")
+        self.index = 0
+        self._frame = None
+
+    def advance(self):
+        """Serve the next image; returns False once the last one has been reached."""
+        if self.index + 1 >= len(self.paths):
+            return False
+        self.index += 1
+        self._frame = None
+        return True
+
+    def _grab(self, region, grayscale):
+        if self._frame is None:
+            self._frame = cv2.imread(self.paths[self.index], cv2.IMREAD_COLOR)
+            if self._frame is None:
+                raise ValueError(f"Could not read image: {self.paths[self.index]}")
+        frame = self._frame
+        if region is not None:
+            left, top, width, height = region
+            frame = frame[top:top + height, left:left + width]  # a view, not a copy
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if grayscale else frame
+
+
+_capture_backends = {}
+
+def get_capture_backend(config):
+    """Return the shared capture backend selected by `capture_backend` in config.json."""
+    name = config.get("capture_backend", "auto")
+    key = (name, config.get("capture_file_source"))
+    if key not in _capture_backends:
+        if name == "file":
+            backend = FileBackend(config["capture_file_source"])
+        elif name == "pyautogui":
+            backend = PyAutoGuiBackend()
+        else:
+            try:
+                backend = MssBackend()
+            except ImportError:
+                if name == "mss":
+                    raise
+                backend = PyAutoGuiBackend()
+        print(f"Capture backend: {backend.name}")
+        _capture_backends[key] = backend
+    return _capture_backends[key]
+
+
+def capture_scoreboard(backend, bank, threshold=0.8, margin=ANCHOR_REGION_MARGIN):
+    """Capture the scoreboard, grabbing only its region when the anchor position is known.
+
+    If the previous anchor is confirmed inside a region grab (the scoreboard
+    plus `margin`), only that region is captured; otherwise the full screen is
+    grabbed and searched with the template bank. `frame` is whatever was
+    grabbed, `board` the scoreboard crop (None when no anchor was found).
+    """
+    anchor = last_anchor()
+    if anchor is not None and backend.frame_size is not None:
+        name, (x, y) = anchor
+        templates = bank.templates([name])
+        if templates:
+            screen_width, screen_height = backend.frame_size
+            board_width, board_height = scoreboard_size(backend.frame_size)
+            left, top = max(0, x - margin), max(0, y - margin)
+            right = min(screen_width, x + board_width + margin)
+            bottom = min(screen_height, y + board_height + margin)
+            frame = backend.grab((left, top, right - left, bottom - top))
+            score, location = match_template_near(frame, templates[0][1], x - left, y - top, radius=margin)
+            print(f"Template '{name}' match value at last position: {score}")
+            if location is not None and score > threshold:
+                top_left = (left + location[0], top + location[1])
+                remember_anchor(name, top_left)
+                board = frame[location[1]:location[1] + board_height, location[0]:location[0] + board_width]
+                return ScoreboardCapture(frame, board, top_left, score)
+
+    frame = backend.grab()
+    top_left, score = bank.match(frame, threshold)
+    if top_left is None:
+        return ScoreboardCapture(frame, None, None, score)
+    board_width, board_height = scoreboard_size(backend.frame_size)
+    board = frame[top_left[1]:top_left[1] + board_height, top_left[0]:top_left[0] + board_width]
+    return ScoreboardCapture(frame, board, top_left, score)
+
+
+class ScoreboardWatcher:
+    """Watches the screen at a low frame rate and reports when the scoreboard appears.
+
+    Each poll grabs, in grayscale, only the small area around the last known
+    anchor position and correlates a downsampled copy of it with the
+    downsampled anchor template. The full screen is searched (also downsampled)
+    only until an anchor position is known, and then every `search_every`
+    polls in case the scoreboard moved. `on_scoreboard` is called from the
+    watcher thread once the anchor has been seen on `confirm_polls` consecutive
+    polls, and returns whether it accepted the save. Once accepted it is not
+    called again until the anchor has been gone for as many polls; a refused
+    save (e.g. a capture still running) is offered again on the next poll.
+    """
+
+    def __init__(self, backend, bank, on_scoreboard, interval=1.0, threshold=0.7, confirm_polls=2, search_every=30):
+        self.backend = backend
+        self.bank = bank
+        self.on_scoreboard = on_scoreboard
+        self.interval = interval
+        self.threshold = threshold
+        self.confirm_polls = confirm_polls
+        self.search_every = search_every
+        self.polls = 0
+        self.poll_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.started_at = None
+        self._visible_streak = 0
+        self._hidden_streak = 0
+        self._armed = True
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="scoreboard-watcher", daemon=True)
+        self._thread.start()
+        print("Scoreboard watcher started.")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        print(f"Scoreboard watcher stopped. {self.stats()}")
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def poll(self):
+        """One idle check: True when the team-1 anchor is on screen."""
+        scale = 2 ** self.bank.levels
+        anchor = last_anchor()
+        if anchor is not None and self.backend.frame_size is not None:
+            name, (x, y) = anchor
+            templates = self.bank.templates([name])
+            if templates:
+                _, template, small_template = templates[0]
+                screen_width, screen_height = self.backend.frame_size
+                left, top = max(0, x - ANCHOR_REGION_MARGIN), max(0, y - ANCHOR_REGION_MARGIN)
+                right = min(screen_width, x + template.shape[1] + ANCHOR_REGION_MARGIN)
+                bottom = min(screen_height, y + template.shape[0] + ANCHOR_REGION_MARGIN)
+                region = downsample_gray(self.backend.grab((left, top, right - left, bottom - top), grayscale=True), self.bank.levels)
+                if region.shape[0] >= small_template.shape[0] and region.shape[1] >= small_template.shape[1]:
+                    result = cv2.matchTemplate(region, small_template, cv2.TM_CCOEFF_NORMED)
+                    if cv2.minMaxLoc(result)[1] > self.threshold:
+                        return True
+                if self.polls % self.search_every:
+                    return False
+
+        frame = downsample_gray(self.backend.grab(grayscale=True), self.bank.levels)
+        for name, _, small_template in self.bank.templates():
+            if small_template.shape[0] > frame.shape[0] or small_template.shape[1] > frame.shape[1]:
+                continue
+            result = cv2.matchTemplate(frame, small_template, cv2.TM_CCOEFF_NORMED)
+            _, score, _, location = cv2.minMaxLoc(result)
+            if score > self.threshold:
+                # Coarse position; the capture itself refines it within its search margin
+                remember_anchor(name, (location[0] * scale, location[1] * scale))
+                return True
+        return False
+
+    def _run(self):
+        while not self._stop.is_set():
+            started = time.perf_counter()
+            cpu_started = time.thread_time()
+            try:
+                visible = self.poll()
+            except Exception as e:
+                print(f"Scoreboard watcher poll failed: {e}")
+                visible = False
+            self.polls += 1
+            self.poll_seconds += time.perf_counter() - started
+            self.cpu_seconds += time.thread_time() - cpu_started
+
+            if visible:
+                self._visible_streak += 1
+                self._hidden_streak = 0
+                if self._armed and self._visible_streak >= self.confirm_polls:
+                    # Stays armed if refused, so the save is offered again on the next poll
+                    if self.on_scoreboard():
+                        self._armed = False
+                        print("Scoreboard detected by watcher.")
+            else:
+                self._hidden_streak += 1
+                self._visible_streak = 0
+                if self._hidden_streak >= self.confirm_polls:
+                    self._armed = True
+
+            self._stop.wait(max(0.0, self.interval - (time.perf_counter() - started)))
+
+    def stats(self):
+        """Average cost of one poll and the share of one CPU core the watcher has used."""
+        if not self.polls:
+            return "Watcher: no polls yet"
+        elapsed = time.perf_counter() - self.started_at
+        return (f"Watcher: {self.polls} polls, {self.poll_seconds / self.polls * 1000:.1f} ms/poll, "
+                f"{self.cpu_seconds / self.polls * 1000:.1f} ms CPU/poll, "
+                f"{self.cpu_seconds / elapsed:.2%} CPU")
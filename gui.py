@@ -1,20 +1,30 @@
 import os
 import sys
-import csv
 import json
+import pickle
+import threading
+from collections import OrderedDict
+import numpy as np
 import pandas as pd
 
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QVBoxLayout, QTabWidget, QWidget, QLabel,
-    QLineEdit, QPushButton, QTableWidget, QTableWidgetItem, QProgressBar,
-    QComboBox, QHBoxLayout
+    QLineEdit, QPushButton, QTableView, QProgressBar,
+    QComboBox, QHBoxLayout, QCheckBox, QCompleter
 )
-from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QPainter, QIcon
-from PyQt6.QtCharts import QChart, QChartView, QBarSeries, QBarSet, QBarCategoryAxis, QValueAxis
+from PyQt6.QtCore import (
+    Qt, QPointF, QTimer, QThread, QObject, pyqtSignal, QAbstractTableModel, QModelIndex, QSortFilterProxyModel
+)
+from PyQt6.QtGui import QPainter, QIcon, QStandardItemModel, QStandardItem
+
+# The capture/OCR modules (main, utils, capture), the Parquet history and QtCharts are
+# imported where they are first needed, so the window can appear before they load.
+from store import get_match_store
+from analytics import match_entities, lifetime_columns, chart_series
+from trends import PlayerTrends, TREND_METRICS, TREND_WINDOWS, CAREER
 
-from main import process_screenshot
-from utils import load_config
+# Columns the trends need; the columnar history reads only these, and only the tracked player's rows
+TREND_COLUMNS = ["uuid", "player", "score", "kills", "damage", "goldSpent", "datetime", "Victory/Defeat"]
 
 from pathlib import Path
 
@@ -37,16 +47,367 @@ ICON_PATH = os.path.join(base_path, "icon.ico")
 # Define DATA_FOLDER relative to base_path
 DATA_FOLDER = os.path.join(base_path, "data")
 LAST_SESSION_FOLDER = os.path.join(DATA_FOLDER, "last_session")
+# What the Analytics tab showed when last updated, painted first on the next launch
+ANALYTICS_SNAPSHOT_FILE = os.path.join(DATA_FOLDER, "analytics_snapshot.json")
+# Lifetime rows kept in the snapshot: the first page, as the table is first shown (by total score)
+SNAPSHOT_LIFETIME_ROWS = 50
+# Lifetime table, match contexts and chart series computed for the current data and player
+ANALYTICS_CACHE_FILE = os.path.join(DATA_FOLDER, "analytics_cache.pkl")
+
+# Display names for the columns of output.csv
+LATEST_GAME_LABELS = {
+    "uuid": "UUID", "row": "Row", "player": "Player", "level": "Level", "score": "Score", "kills": "Kills",
+    "damage": "Damage", "goldSpent": "Gold Spent", "team": "Team", "Victory/Defeat": "Victory/Defeat",
+    "datetime": "Datetime", "invalidCells": "Unreadable",
+}
+
+
+class ColumnTableModel(QAbstractTableModel):
+    """Read-only table model over a list of equal-length column arrays.
+
+    Nothing is converted up front: the view asks only for the cells it shows.
+    Raw values are returned under UserRole so a QSortFilterProxyModel sorts
+    numbers numerically; `formats` are optional format strings per column.
+    """
+
+    def __init__(self, headers=(), parent=None):
+        super().__init__(parent)
+        self._headers = list(headers)
+        self._columns = []
+        self._formats = []
+        self._numeric = []
+        self._row_count = 0
+
+    def set_columns(self, headers, columns, formats=None):
+        self.beginResetModel()
+        self._headers = list(headers)
+        self._columns = [np.asarray(column) for column in columns]
+        self._formats = list(formats) if formats is not None else [None] * len(self._headers)
+        self._numeric = [column.dtype.kind in "iuf" for column in self._columns]
+        self._row_count = len(self._columns[0]) if self._columns else 0
+        self.endResetModel()
+
+    def set_frame(self, frame, headers=None, formats=None):
+        """Show a DataFrame's columns (under `headers` if given)."""
+        self.set_columns(
+            headers if headers is not None else list(frame.columns),
+            [frame[column].to_numpy() for column in frame.columns],
+            formats,
+        )
+
+    def clear(self):
+        self.beginResetModel()
+        self._columns = []
+        self._row_count = 0
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._row_count
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._headers)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.column() >= len(self._columns):
+            return None
+        column = index.column()
+        value = self._columns[column][index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            if self._formats[column] is not None:
+                return self._formats[column].format(value)
+            return str(value)
+        if role == Qt.ItemDataRole.UserRole:
+            return value.item() if isinstance(value, np.generic) else value
+        if role == Qt.ItemDataRole.TextAlignmentRole and self._numeric[column]:
+            return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self._headers[section] if section < len(self._headers) else None
+        return section + 1
+
+    def snapshot(self, max_rows=None):
+        """The table's contents (the first `max_rows` rows if given) as JSON-compatible lists."""
+        return {
+            "headers": self._headers,
+            "columns": [column[:max_rows].tolist() for column in self._columns],
+            "formats": self._formats,
+        }
+
+    def restore(self, snapshot):
+        self.set_columns(snapshot["headers"], snapshot["columns"], snapshot["formats"])
+
+
+def make_table_view(model):
+    """A sortable QTableView showing `model` through a filtering proxy; returns (view, proxy)."""
+    proxy = QSortFilterProxyModel()
+    proxy.setSourceModel(model)
+    proxy.setSortRole(Qt.ItemDataRole.UserRole)
+    proxy.setFilterKeyColumn(-1)
+    proxy.setFilterCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+    view = QTableView()
+    view.setModel(proxy)
+    view.setSortingEnabled(True)
+    view.setAlternatingRowColors(True)
+    return view, proxy
+
+
+def match_label(summary):
+    """Selector text for a match: date, the player's outcome and the opposing players."""
+    # As in the analytics, a match the player is not in is seen from Team 1
+    player_team = summary.team or "Team 1"
+    opponents = []
+    for entry in (summary.roster or "").split("|"):
+        team, _, player = entry.partition(":")
+        if team != player_team and player:
+            opponents.append(player)
+    outcome = summary.outcome or "Not played"
+    return f"{str(summary.datetime)[:16]}  {outcome}  vs {', '.join(opponents) or '?'}  ({summary.uuid[:8]})"
+
+
+class AnalyticsCache:
+    """Derived analytics, kept on disk between launches.
+
+    Entries are valid for one store data version and tracked player; when
+    either changes (a match was saved, the player name was edited) the whole
+    cache is dropped. Only the most recently used `max_entries` are kept.
+    """
+
+    def __init__(self, path=ANALYTICS_CACHE_FILE, max_entries=1000):
+        self.path = path
+        self.max_entries = max_entries
+        self.key = None
+        self.entries = OrderedDict()
+        self.dirty = False
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "rb") as file:
+                self.key, self.entries = pickle.load(file)
+        except Exception:
+            # Missing, from an older version or unreadable: start empty
+            self.key, self.entries = None, OrderedDict()
+
+    def validate(self, version, player_name):
+        """Drop every entry if they were computed for other data or another player."""
+        if self.key != (version, player_name):
+            self.key = (version, player_name)
+            self.invalidate()
+
+    def invalidate(self):
+        if self.entries:
+            self.entries.clear()
+            self.dirty = True
+
+    def get(self, name):
+        if name not in self.entries:
+            return None
+        self.entries.move_to_end(name)
+        return self.entries[name]
+
+    def put(self, name, value):
+        self.entries[name] = value
+        self.entries.move_to_end(name)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        self.dirty = True
+        return value
+
+    def save(self):
+        if not self.dirty:
+            return
+        temp_file = self.path + ".tmp"
+        try:
+            with open(temp_file, "wb") as file:
+                pickle.dump((self.key, self.entries), file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_file, self.path)
+            self.dirty = False
+        except (OSError, pickle.PicklingError) as e:
+            print(f"Could not save the analytics cache: {e}")
+
+
+class MatchIndex:
+    """The matches offered in the Analytics tab.
+
+    Keeps uuid -> row range of every known match and an item model with one
+    labelled entry per match, newest first. `refresh` only asks the store for
+    matches ingested since the last call and adds those.
+    """
+
+    def __init__(self, store, player_name):
+        self.store = store
+        self.player_name = player_name
+        self.model = QStandardItemModel()
+        self.row_ranges = {}
+        self.last_match_id = 0
+
+    def refresh(self):
+        """Add matches ingested since the last refresh; returns how many were added."""
+        if self.store is None:
+            return 0
+        summaries = self.store.match_summaries(self.player_name, self.last_match_id)
+        for summary in summaries.itertuples(index=False):
+            item = QStandardItem(match_label(summary))
+            item.setData(summary.uuid, Qt.ItemDataRole.UserRole)
+            item.setEditable(False)
+            self.model.insertRow(0, item)
+            self.row_ranges[summary.uuid] = (summary.first_row, summary.last_row)
+            self.last_match_id = summary.id
+        return len(summaries)
+
+    def reset(self, player_name):
+        """Rebuild every label, e.g. after the tracked player changed."""
+        self.player_name = player_name
+        self.model.clear()
+        self.row_ranges.clear()
+        self.last_match_id = 0
+        self.refresh()
+
+    def row_of(self, uuid):
+        """Selector row of a match, or -1."""
+        for row in range(self.model.rowCount()):
+            if self.model.item(row).data(Qt.ItemDataRole.UserRole) == uuid:
+                return row
+        return -1
+
+    def match_frame(self, uuid):
+        """The player rows of one match (a primary-key range read)."""
+        if uuid not in self.row_ranges:
+            return self.store.match_frame(uuid)
+        first_row, last_row = self.row_ranges[uuid]
+        return self.store.match_rows(uuid, int(first_row), int(last_row))
+
+
+class AggregateData:
+    """The tracked player's rows for the analytics, re-read only when the data changed.
+
+    From the columnar history, only `columns` and the rows of `player_name` are
+    read (the player filter is pushed down to the Parquet row groups). The
+    files already read are remembered by size
+    and mtime: new files are read and appended, and everything is re-read only
+    if a known file changed or went away (e.g. after compaction). From the
+    match store, rows with ids above the last one read are appended.
+    `reloads` counts the full re-reads, after which the rows may be in a
+    different order. `load` is called from the GUI and the screenshot worker
+    threads, so it holds a lock while it reads and appends.
+    """
+
+    def __init__(self, store, player_name, columns=TREND_COLUMNS):
+        self.store = store
+        self.player_name = player_name
+        self.columns = columns
+        self.frame = None
+        self.reloads = 0
+        self._lock = threading.Lock()
+        self._files = {}
+        self._last_row_id = 0
+
+    def load(self):
+        """Return the current rows, reading only what was added since the last call."""
+        from history import history_available, ensure_history
+        with self._lock:
+            if history_available():
+                ensure_history(self.store)
+                self._load_history()
+            else:
+                self._load_store()
+            return self.frame if self.frame is not None else pd.DataFrame(columns=self.columns)
+
+    def set_player(self, player_name):
+        """Switch to another player's rows; they are read on the next load."""
+        with self._lock:
+            self.player_name = player_name
+            self.frame = None
+            self.reloads += 1
+            self._files = {}
+            self._last_row_id = 0
+
+    def _load_history(self):
+        from history import history_files, read_history, concat_history, HISTORY_FOLDER
+        files = history_files()
+        if files == self._files:
+            return
+        if any(files.get(path) != stamp for path, stamp in self._files.items()):
+            print(f"Reloading aggregate data from: {HISTORY_FOLDER}")
+            self.frame = read_history(self.columns, players=[self.player_name], paths=list(files))
+            self.reloads += 1
+        else:
+            new_files = [path for path in files if path not in self._files]
+            new_rows = read_history(self.columns, players=[self.player_name], paths=new_files)
+            self.frame = concat_history([self.frame, new_rows])
+            print(f"Read {len(new_files)} new history files")
+        self._files = files
+        print(f"Aggregate data loaded successfully. Rows: {len(self.frame)}")
+
+    def _load_store(self):
+        if self.store.last_player_row_id() == self._last_row_id:
+            return
+        new_rows = self.store.player_rows_since(self._last_row_id)
+        self._last_row_id = int(new_rows["id"].iloc[-1])
+        new_rows = new_rows.loc[new_rows["player"] == self.player_name, self.columns]
+        self.frame = pd.concat(
+            [frame for frame in (self.frame, new_rows) if frame is not None], ignore_index=True
+        )
+        print(f"Read {len(new_rows)} new rows from {self.store.path}. Rows: {len(self.frame)}")
+
+
+class ScreenshotWorker(QObject):
+    """Runs the capture/OCR pipeline on a QThread and reports each stage.
+
+    `load_data` is called on the worker thread after the match is saved, so the
+    GUI receives the reloaded aggregate data along with the result.
+    """
+    progress = pyqtSignal(int, str)
+    succeeded = pyqtSignal(object, object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, player_name, load_data):
+        super().__init__()
+        self.player_name = player_name
+        self.load_data = load_data
+
+    def run(self):
+        try:
+            from main import process_screenshot
+            result = process_screenshot(self.player_name, progress=self.progress.emit)
+            self.progress.emit(95, "Reloading match data...")
+            aggregate_data = self.load_data()
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.succeeded.emit(result, aggregate_data)
+
+
+def warm_up_capture():
+    """Import the capture/OCR modules and load the OCR models and templates, so the first capture is not slower."""
+    try:
+        from utils import warm_up_ocr_engine, get_template_bank
+        get_template_bank().templates()
+        warm_up_ocr_engine()
+    except Exception as e:
+        print(f"Could not warm up the OCR engine: {e}")
 
 
 class GameStatsApp(QMainWindow):
+    # Emitted from the watcher thread; Qt delivers it to the GUI thread
+    scoreboard_detected = pyqtSignal()
+    # Emitted from the startup thread once the match store and aggregate data are loaded
+    data_loaded = pyqtSignal(object, object)
+    # Emitted from the startup thread if the match store could not be opened
+    data_load_failed = pyqtSignal(str)
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("DirectStrike Stats")
         self.setGeometry(100, 100, 1200, 800)
 
         # Load configuration
-        self.config = load_config(CONFIG_FILE)
+        with open(CONFIG_FILE, "r") as file:
+            self.config = json.load(file)
         self.player_name = self.config.get("player_name", "Default Player")
         
         # Set the window icon
@@ -56,8 +417,29 @@ class GameStatsApp(QMainWindow):
         if not os.path.exists(DATA_FOLDER):
             os.makedirs(DATA_FOLDER)
 
-        # Attempt to load aggregate data
-        self.aggregate_data = self.load_aggregate_data()
+        # Set while a screenshot is being processed; further requests are refused until it finishes
+        self.screenshot_thread = None
+        self.screenshot_worker = None
+        # Claimed by a button click or the watcher (on its own thread) before a capture starts
+        self.capture_lock = threading.Lock()
+        self.capture_busy = False
+
+        # Filled in by load_data_in_background; until then the analytics show the last snapshot
+        self.match_store = None
+        self.aggregate_source = None
+        self.aggregate_data = pd.DataFrame(columns=TREND_COLUMNS)
+        self.data_loaded.connect(self.on_data_loaded)
+        self.data_load_failed.connect(self.on_data_load_failed)
+        # Built when the Analytics tab is first opened
+        self.chart_view = None
+        self.chart_data = None
+        self.trend_chart_view = None
+        self.trends = PlayerTrends(self.player_name)
+        self.analytics_cache = AnalyticsCache()
+        # Written now and then and on close, not on every cache miss
+        self.analytics_cache_timer = QTimer(self)
+        self.analytics_cache_timer.timeout.connect(self.analytics_cache.save)
+        self.analytics_cache_timer.start(60000)
 
         # Central widget with tabs
         self.central_widget = QWidget()
@@ -78,23 +460,67 @@ class GameStatsApp(QMainWindow):
 
         self.setup_analytics_tab()
         self.tab_widget.addTab(self.analytics_tab, "Analytics")
+        self.tab_widget.currentChanged.connect(self.on_tab_changed)
 
         self.central_widget.setLayout(layout)
 
-    def load_aggregate_data(self):
-        # Load aggregate player data if it exists
-        player_data_path = os.path.join(DATA_FOLDER, "aggregate_player_data.csv")
-        print(f"Loading aggregate data from: {player_data_path}")
-        if os.path.exists(player_data_path):
+        # Open the store (importing the aggregate CSVs the first time) once the window is up
+        QTimer.singleShot(0, self.load_data_in_background)
+
+    def load_data_in_background(self):
+        def load():
             try:
-                df = pd.read_csv(player_data_path)
-                print(f"Aggregate data loaded successfully. Rows: {len(df)}")
-                return df
+                store = get_match_store()
+                source = AggregateData(store, self.player_name)
+                try:
+                    source.load()
+                except Exception as e:
+                    # The store still works without the aggregate rows; the next refresh retries
+                    print(f"Error loading aggregate data: {e}")
             except Exception as e:
-                print(f"Error loading aggregate data: {e}")
-                return pd.DataFrame()
-        else:
-            print("No aggregate_player_data.csv found.")
+                self.data_load_failed.emit(str(e))
+            else:
+                self.data_loaded.emit(store, source)
+            # Then load the capture pipeline so the first capture is not slower than the rest
+            warm_up_capture()
+
+        threading.Thread(target=load, daemon=True).start()
+
+    def on_data_loaded(self, store, source):
+        self.match_store = store
+        self.aggregate_source = source
+        self.aggregate_data = self.load_aggregate_data()
+        self.match_index.store = store
+        self.match_selector.blockSignals(True)
+        self.match_index.refresh()
+        snapshot_uuid = self.snapshot.get("uuid") if self.snapshot else None
+        self.match_selector.setCurrentIndex(max(self.match_index.row_of(snapshot_uuid), 0) if self.match_selector.count() else -1)
+        self.match_selector.blockSignals(False)
+        self.update_analytics_view()
+
+    def on_data_load_failed(self, error):
+        # The analytics keep showing the last snapshot, which is now known to be stale
+        self.statusBar().showMessage(f"Error opening the match data: {error}")
+
+    def on_tab_changed(self, index):
+        if self.tab_widget.widget(index) is self.analytics_tab and self.chart_view is None:
+            from PyQt6.QtCharts import QChartView
+            self.chart_view = QChartView()
+            self.chart_section.addWidget(self.chart_view)
+            self.update_chart(self.chart_data)
+            self.trend_chart_view = QChartView()
+            self.trend_section.addWidget(self.trend_chart_view, 1)
+            self.update_trend_chart()
+
+    def load_aggregate_data(self):
+        # Load aggregate player data from the columnar history, or the match store without pyarrow;
+        # unchanged data is not read again and new data is appended
+        if self.aggregate_source is None:
+            return self.aggregate_data
+        try:
+            return self.aggregate_source.load()
+        except Exception as e:
+            print(f"Error loading aggregate data: {e}")
             return pd.DataFrame()
 
     def setup_game_stats_tab(self):
@@ -107,6 +533,17 @@ class GameStatsApp(QMainWindow):
         self.screenshot_button.clicked.connect(self.take_screenshot)
         layout.addWidget(self.screenshot_button)
 
+        # Automatic capture when the end-of-game scoreboard appears
+        self.scoreboard_watcher = None
+        self.watch_checkbox = QCheckBox("Automatically save game data when the scoreboard appears")
+        self.watch_checkbox.toggled.connect(self.toggle_scoreboard_watcher)
+        layout.addWidget(self.watch_checkbox)
+        self.watch_status_label = QLabel("")
+        layout.addWidget(self.watch_status_label)
+        self.watch_stats_timer = QTimer(self)
+        self.watch_stats_timer.timeout.connect(self.update_watch_status)
+        self.scoreboard_detected.connect(self.start_screenshot)
+
         # Progress Bar
         self.progress_bar = QProgressBar()
         self.progress_bar.setValue(0)
@@ -114,10 +551,8 @@ class GameStatsApp(QMainWindow):
 
         # Latest Game Table
         self.latest_game_label = QLabel("Latest Game Data:")
-        self.latest_game_table = QTableWidget(0, 11)
-        self.latest_game_table.setHorizontalHeaderLabels(
-            ["UUID", "Row", "Player", "Level", "Score", "Kills", "Damage", "Gold Spent", "Team", "Victory/Defeat", "Datetime"]
-        )
+        self.latest_game_model = ColumnTableModel(LATEST_GAME_LABELS.values(), self)
+        self.latest_game_table, self.latest_game_proxy = make_table_view(self.latest_game_model)
         layout.addWidget(self.latest_game_label)
         layout.addWidget(self.latest_game_table)
 
@@ -182,7 +617,18 @@ class GameStatsApp(QMainWindow):
         match_label = QLabel("Select Match UUID:")
         top_layout.addWidget(match_label)
 
+        # Editable so matches can be found by typing part of a date, outcome or opponent name
+        self.match_index = MatchIndex(None, self.player_name)
         self.match_selector = QComboBox()
+        self.match_selector.setModel(self.match_index.model)
+        self.match_selector.setEditable(True)
+        self.match_selector.setInsertPolicy(QComboBox.InsertPolicy.NoInsert)
+        self.match_selector.lineEdit().setPlaceholderText("Search matches...")
+        match_completer = QCompleter(self.match_index.model, self.match_selector)
+        match_completer.setFilterMode(Qt.MatchFlag.MatchContains)
+        match_completer.setCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+        self.match_selector.setCompleter(match_completer)
+        self.match_selector.setMinimumWidth(450)
         top_layout.addWidget(self.match_selector)
 
         # Add the Refresh button
@@ -192,11 +638,6 @@ class GameStatsApp(QMainWindow):
 
         main_layout.addLayout(top_layout)
 
-        if not self.aggregate_data.empty:
-            matches = self.aggregate_data["uuid"].unique()
-            for m in matches:
-                self.match_selector.addItem(m)
-
         self.match_selector.currentIndexChanged.connect(self.update_analytics_view)
 
         # Create a horizontal layout for the three main sections:
@@ -205,21 +646,26 @@ class GameStatsApp(QMainWindow):
         # Left section: Match Context & Comparison
         left_section = QVBoxLayout()
         self.match_context_label = QLabel("Match Context & Comparison:")
-        self.match_context_table = QTableWidget()
+        self.match_context_model = ColumnTableModel(parent=self)
+        self.match_context_table, self.match_context_proxy = make_table_view(self.match_context_model)
         left_section.addWidget(self.match_context_label)
         left_section.addWidget(self.match_context_table)
 
         # Middle section: Lifetime Stats
         middle_section = QVBoxLayout()
         self.lifetime_label = QLabel("Lifetime Stats:")
-        self.lifetime_table = QTableWidget()
+        self.lifetime_model = ColumnTableModel(parent=self)
+        self.lifetime_table, self.lifetime_proxy = make_table_view(self.lifetime_model)
+        self.lifetime_filter_input = QLineEdit()
+        self.lifetime_filter_input.setPlaceholderText("Filter players...")
+        self.lifetime_filter_input.textChanged.connect(self.lifetime_proxy.setFilterFixedString)
         middle_section.addWidget(self.lifetime_label)
+        middle_section.addWidget(self.lifetime_filter_input)
         middle_section.addWidget(self.lifetime_table)
 
-        # Right section: Chart
+        # Right section: Chart (the view is added when the tab is first opened)
         right_section = QVBoxLayout()
-        self.chart_view = QChartView()
-        right_section.addWidget(self.chart_view)
+        self.chart_section = right_section
 
         # Add these three sections to the horizontal layout
         h_layout.addLayout(left_section)
@@ -232,187 +678,154 @@ class GameStatsApp(QMainWindow):
         h_layout.setStretch(2, 1)  # right section 1/5
 
         main_layout.addLayout(h_layout)
+
+        # Bottom section: one stat over time (the chart is added when the tab is first opened)
+        trend_controls = QHBoxLayout()
+        trend_controls.addWidget(QLabel("Trend:"))
+        self.trend_metric_selector = QComboBox()
+        for metric, label in TREND_METRICS.items():
+            self.trend_metric_selector.addItem(label, metric)
+        self.trend_metric_selector.currentIndexChanged.connect(self.update_trend_chart)
+        trend_controls.addWidget(self.trend_metric_selector)
+        self.trend_window_selector = QComboBox()
+        self.trend_window_selector.addItems(list(TREND_WINDOWS))
+        self.trend_window_selector.currentIndexChanged.connect(self.update_trend_chart)
+        trend_controls.addWidget(self.trend_window_selector)
+        trend_controls.addStretch()
+        self.trend_section = QVBoxLayout()
+        self.trend_section.addLayout(trend_controls)
+        main_layout.addLayout(self.trend_section)
+        main_layout.setStretch(1, 3)
+        main_layout.setStretch(2, 2)
+
         self.analytics_tab.setLayout(main_layout)
 
-        # Initialize analytics view if we have data
-        if not self.aggregate_data.empty and len(self.match_selector) > 0:
-            self.update_analytics_view()
+        # First paint from the last snapshot; the real data replaces it once loaded
+        self.snapshot = self.load_snapshot()
+        # What the snapshot on disk was taken from; it is only rewritten when this changes
+        self.snapshot_key = None
+        if self.snapshot:
+            self.snapshot_key = (self.snapshot.get("version"), self.snapshot.get("player"), self.snapshot["uuid"])
+            self.match_selector.lineEdit().setText(self.snapshot["label"])
+            self.match_context_model.restore(self.snapshot["match_context"])
+            self.lifetime_model.restore(self.snapshot["lifetime"])
+            self.match_context_table.resizeColumnsToContents()
+            self.lifetime_table.resizeColumnsToContents()
+
+    def load_snapshot(self):
+        try:
+            with open(ANALYTICS_SNAPSHOT_FILE, "r") as file:
+                snapshot = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(snapshot, dict) or not all(key in snapshot for key in ("uuid", "label", "match_context", "lifetime")):
+            return None
+        return snapshot
+
+    def save_snapshot(self, selected_uuid):
+        """Persist what the first paint of the next launch shows, if the data or the selection changed."""
+        version, player_name = self.analytics_cache.key
+        key = (version, player_name, selected_uuid)
+        if key == self.snapshot_key:
+            return
+        snapshot = {
+            "version": version,
+            "player": player_name,
+            "uuid": selected_uuid,
+            "label": self.match_selector.currentText(),
+            "match_context": self.match_context_model.snapshot(),
+            "lifetime": self.lifetime_model.snapshot(SNAPSHOT_LIFETIME_ROWS),
+        }
+        temp_file = ANALYTICS_SNAPSHOT_FILE + ".tmp"
+        try:
+            with open(temp_file, "w") as file:
+                json.dump(snapshot, file)
+            os.replace(temp_file, ANALYTICS_SNAPSHOT_FILE)
+            self.snapshot_key = key
+        except (OSError, TypeError, ValueError) as e:
+            print(f"Could not save the analytics snapshot: {e}")
 
 
     def update_analytics_view(self):
         """Update the analytics tab based on the selected match UUID."""
-        # Reload the aggregate data to ensure we have the latest updates
+        if self.match_store is None:
+            # Still loading; on_data_loaded calls this again
+            return
+
+        # Picks up matches saved elsewhere (e.g. by backfill.py); costs next to nothing when nothing changed
         self.aggregate_data = self.load_aggregate_data()
+        # Only the matches added since the last update are folded into the trends
+        if self.trends.update(self.aggregate_data, self.aggregate_source.reloads):
+            self.update_trend_chart()
+
+        # Results computed for the same data and player are reused, across launches too
+        cache = self.analytics_cache
+        cache.validate(self.match_store.data_version(), self.player_name)
 
-        if self.aggregate_data.empty:
+        # Lifetime totals are kept up to date by the store as matches are ingested
+        lifetime = cache.get("lifetime")
+        if lifetime is None:
+            totals = self.match_store.player_totals()
+            lifetime = cache.put("lifetime", lifetime_columns(totals) if not totals.empty else ())
+
+        if not lifetime:
             self.statusBar().showMessage("No aggregate data available.", 5000)
             self.clear_analytics_tables()
             return
 
-        # Remember currently selected UUID
-        currently_selected_uuid = self.match_selector.currentText()
-
-        # Clear and repopulate the match selector with updated UUIDs
+        # Add only the matches ingested since the last refresh; the current selection is kept
         self.match_selector.blockSignals(True)  # Temporarily block signals to avoid triggering update_analytics_view() again
-        self.match_selector.clear()
-        all_matches = self.aggregate_data["uuid"].unique()
-        for m in all_matches:
-            self.match_selector.addItem(m)
+        self.match_index.refresh()
+        if self.match_selector.currentIndex() < 0 and self.match_selector.count() > 0:
+            self.match_selector.setCurrentIndex(0)
         self.match_selector.blockSignals(False)
 
-        # Attempt to restore previously selected UUID if it exists
-        if currently_selected_uuid in all_matches:
-            idx = self.match_selector.findText(currently_selected_uuid)
-            if idx >= 0:
-                self.match_selector.setCurrentIndex(idx)
-        else:
-            # If the previously selected UUID no longer exists, just pick the first one
-            if len(all_matches) > 0:
-                self.match_selector.setCurrentIndex(0)
-
-        selected_uuid = self.match_selector.currentText()
+        selected_uuid = self.match_selector.currentData(Qt.ItemDataRole.UserRole)
         if not selected_uuid:
             self.clear_analytics_tables()
             return
 
-        # Filter for the selected match using the updated aggregate data
-        match_df = self.aggregate_data[self.aggregate_data["uuid"] == selected_uuid]
-
-        if match_df.empty:
-            self.statusBar().showMessage("No data for this match.", 5000)
-            self.clear_analytics_tables()
-            return
-        
-        if 'uuid' not in self.aggregate_data.columns:
-            self.statusBar().showMessage("No 'uuid' column found in data. Check aggregate_player_data.csv.", 5000)
-            self.clear_analytics_tables()
-            return
-
-        # The rest of your code remains the same for processing match_df...
-        # (numeric columns, summarizing stats, updating tables, chart, etc.)
-        numeric_cols = ["score", "kills", "damage", "goldSpent"]
-        match_df = match_df.copy()  # Ensure working on a copy
-        for col in numeric_cols:
-            match_df[col] = pd.to_numeric(match_df[col], errors='coerce').fillna(0)
-
-        # Identify player's team
-        player_rows = match_df[match_df["player"] == self.player_name]
-        if player_rows.empty:
-            # If player's not found in this match, assume Team 1
-            player_team = "Team 1"
-        else:
-            player_team = player_rows["team"].iloc[0]
-
-        # Separate teammates & opponents
-        teammates_df = match_df[match_df["team"] == player_team]
-        opponents_df = match_df[match_df["team"] != player_team]
-
-        def assign_alias(df, exclude_player=False, prefix="Teammate"):
-            df = df.sort_values(by="player")
-            aliases = {}
-            i = 1
-            for p in df["player"].unique():
-                if exclude_player and p == self.player_name:
-                    continue
-                aliases[p] = f"{prefix} {i}"
-                i += 1
-            return aliases
-
-        teammate_aliases = assign_alias(teammates_df, exclude_player=True, prefix="Teammate")
-        opponent_aliases = assign_alias(opponents_df, prefix="Opponent")
-
-        def summarize_stats(group_df):
-            return {
-                "Total Score": group_df["score"].sum(),
-                "Avg Score": group_df["score"].mean(),
-                "Total Kills": group_df["kills"].sum(),
-                "Avg Kills": group_df["kills"].mean(),
-                "Total Damage": group_df["damage"].sum(),
-                "Avg Damage": group_df["damage"].mean(),
-                "Total Gold": group_df["goldSpent"].sum(),
-                "Avg Gold": group_df["goldSpent"].mean()
-            }
-
-        # Entities
-        entities = {}
-        # Player
-        entities[self.player_name] = summarize_stats(match_df[match_df["player"] == self.player_name])
-        # Each teammate
-        for p, alias in teammate_aliases.items():
-            entities[alias] = summarize_stats(match_df[match_df["player"] == p])
-        # Each opponent
-        for p, alias in opponent_aliases.items():
-            entities[alias] = summarize_stats(match_df[match_df["player"] == p])
-
-        # Teammates (excluding player)
-        non_player_teammates = teammates_df[teammates_df["player"] != self.player_name]
-        if not non_player_teammates.empty:
-            entities["Teammates"] = summarize_stats(non_player_teammates)
-
-        # Whole team
-        entities["Team"] = summarize_stats(teammates_df)
-        # Opponents
-        entities["Opponents"] = summarize_stats(opponents_df)
+        # Player, each teammate and opponent (by alias), then Teammates, Team and Opponents;
+        # computed from the match's rows (fetched by their row range) on a cache miss
+        entities = cache.get(("match", selected_uuid))
+        if entities is None:
+            match_df = self.match_index.match_frame(selected_uuid)
+            if match_df.empty:
+                self.statusBar().showMessage("No data for this match.", 5000)
+                self.clear_analytics_tables()
+                return
+            # Stats are parsed into integers at ingest, so match_df needs no conversion here
+            entities = cache.put(("match", selected_uuid), match_entities(match_df, self.player_name))
+        series = cache.get(("chart", selected_uuid))
+        if series is None:
+            series = cache.put(("chart", selected_uuid), chart_series(entities, self.player_name) or ())
 
         # Fill match_context_table
-        columns = ["Entity","Total Score","Avg Score","Total Kills","Avg Kills","Total Damage","Avg Damage","Total Gold","Avg Gold"]
-        self.match_context_table.setColumnCount(len(columns))
-        self.match_context_table.setHorizontalHeaderLabels(columns)
-        self.match_context_table.setRowCount(len(entities))
-
-        for i, (entity, stats_dict) in enumerate(entities.items()):
-            row_data = [
-                entity,
-                stats_dict["Total Score"], f"{stats_dict['Avg Score']:.2f}",
-                stats_dict["Total Kills"], f"{stats_dict['Avg Kills']:.2f}",
-                stats_dict["Total Damage"], f"{stats_dict['Avg Damage']:.2f}",
-                stats_dict["Total Gold"], f"{stats_dict['Avg Gold']:.2f}"
-            ]
-            for j, val in enumerate(row_data):
-                self.match_context_table.setItem(i, j, QTableWidgetItem(str(val)))
-
+        stat_columns = list(entities.columns)
+        self.match_context_model.set_columns(
+            ["Entity"] + stat_columns,
+            [entities.index.to_numpy(dtype=object)] + [entities[column].to_numpy() for column in stat_columns],
+            [None] + ["{:.2f}" if column.startswith("Avg") else None for column in stat_columns],
+        )
         self.match_context_table.resizeColumnsToContents()
 
-        # Lifetime stats
-        if not self.aggregate_data.empty:
-            lifetime_df = self.aggregate_data.copy()
-            for col in numeric_cols:
-                lifetime_df[col] = pd.to_numeric(lifetime_df[col], errors='coerce').fillna(0)
-
-            lifetime_summary = lifetime_df.groupby("player").agg(
-                TotalScore=("score","sum"),
-                AvgScore=("score","mean"),
-                TotalKills=("kills","sum"),
-                AvgKills=("kills","mean"),
-                TotalDamage=("damage","sum"),
-                AvgDamage=("damage","mean"),
-                TotalGold=("goldSpent","sum"),
-                AvgGold=("goldSpent","mean"),
-                GamesPlayed=("uuid","nunique")
-            ).reset_index().sort_values("TotalScore", ascending=False)
-
-            lifetime_cols = ["Player","GamesPlayed","TotalScore","AvgScore","TotalKills","AvgKills","TotalDamage","AvgDamage","TotalGold","AvgGold"]
-            self.lifetime_table.setColumnCount(len(lifetime_cols))
-            self.lifetime_table.setHorizontalHeaderLabels(lifetime_cols)
-            self.lifetime_table.setRowCount(len(lifetime_summary))
-            for idx, row in lifetime_summary.iterrows():
-                row_values = [
-                    row["player"],
-                    row["GamesPlayed"],
-                    row["TotalScore"], f"{row['AvgScore']:.2f}",
-                    row["TotalKills"], f"{row['AvgKills']:.2f}",
-                    row["TotalDamage"], f"{row['AvgDamage']:.2f}",
-                    row["TotalGold"], f"{row['AvgGold']:.2f}"
-                ]
-                for j, val in enumerate(row_values):
-                    self.lifetime_table.setItem(idx, j, QTableWidgetItem(str(val)))
-            self.lifetime_table.resizeColumnsToContents()
+        # Lifetime stats, read from the per-player running totals
+        self.lifetime_model.set_columns(*lifetime)
+        self.lifetime_table.resizeColumnsToContents()
 
-        # Chart: Player vs Team vs Opponents Avg Score in this match
-        if "Team" in entities and "Opponents" in entities and self.player_name in entities:
-            player_avg_score = entities[self.player_name]["Avg Score"]
-            team_avg_score = entities["Team"]["Avg Score"]
-            opp_avg_score = entities["Opponents"]["Avg Score"]
+        self.update_chart(series)
+        self.save_snapshot(selected_uuid)
+
+    def update_chart(self, series):
+        """Chart: Player vs Team vs Opponents Avg Score in this match (see chart_series)."""
+        self.chart_data = series
+        if self.chart_view is None:
+            # Drawn when the Analytics tab is first opened
+            return
+        from PyQt6.QtCharts import QChart, QBarSeries, QBarSet, QBarCategoryAxis, QValueAxis
+
+        if series:
+            player_avg_score, team_avg_score, opp_avg_score = series
 
             chart = QChart()
             chart.setTitle("Average Score Comparison (This Match)")
@@ -449,10 +862,47 @@ class GameStatsApp(QMainWindow):
             # Clear chart if something is missing
             self.chart_view.setChart(QChart())
 
+    def update_trend_chart(self):
+        """Chart: the selected stat's moving and career averages over every game of the player."""
+        if self.trend_chart_view is None:
+            # Drawn when the Analytics tab is first opened
+            return
+        from PyQt6.QtCharts import QChart, QLineSeries, QDateTimeAxis, QValueAxis
+
+        metric = self.trend_metric_selector.currentData()
+        window = self.trend_window_selector.currentText()
+        chart = QChart()
+        chart.setTitle(f"{TREND_METRICS[metric]} over time")
+        axisX = QDateTimeAxis()
+        axisX.setFormat("yyyy-MM-dd")
+        axisY = QValueAxis()
+        chart.addAxis(axisX, Qt.AlignmentFlag.AlignBottom)
+        chart.addAxis(axisY, Qt.AlignmentFlag.AlignLeft)
+
+        # Series are downsampled in PlayerTrends.series, so long histories stay quick to draw
+        low, high = None, None
+        for name in (window, CAREER):
+            x, y = self.trends.series(metric, name)
+            if len(x) == 0:
+                continue
+            series = QLineSeries()
+            series.setName(name)
+            series.replace([QPointF(px, py) for px, py in zip(x.tolist(), y.tolist())])
+            chart.addSeries(series)
+            series.attachAxis(axisX)
+            series.attachAxis(axisY)
+            low = min(low, y.min()) if low is not None else y.min()
+            high = max(high, y.max()) if high is not None else y.max()
+        if low is not None:
+            axisY.setRange(min(low, 0), high * 1.1 if high > 0 else 1)
+
+        self.trend_chart_view.setChart(chart)
+        self.trend_chart_view.setRenderHint(QPainter.RenderHint.Antialiasing)
+
     def clear_analytics_tables(self):
-        self.match_context_table.setRowCount(0)
-        self.lifetime_table.setRowCount(0)
-        self.chart_view.setChart(QChart())
+        self.match_context_model.clear()
+        self.lifetime_model.clear()
+        self.update_chart(None)
 
     def load_latest_game_data(self):
         """Load the latest game data into the game stats table."""
@@ -462,16 +912,11 @@ class GameStatsApp(QMainWindow):
                 self.statusBar().showMessage("No latest game data found.", 5000)
                 return
 
-            with open(latest_data_file, "r") as file:
-                reader = csv.reader(file)
-                headers = next(reader, None)
-                self.latest_game_table.setRowCount(0)  # Clear existing rows
-
-                for row_data in reader:
-                    row_idx = self.latest_game_table.rowCount()
-                    self.latest_game_table.insertRow(row_idx)
-                    for col_idx, cell_data in enumerate(row_data):
-                        self.latest_game_table.setItem(row_idx, col_idx, QTableWidgetItem(cell_data))
+            latest_data = pd.read_csv(latest_data_file, keep_default_na=False)
+            self.latest_game_model.set_frame(
+                latest_data, [LATEST_GAME_LABELS.get(column, column) for column in latest_data.columns]
+            )
+            self.latest_game_table.resizeColumnsToContents()
 
             self.statusBar().showMessage("Latest game data loaded successfully.", 5000)
         except Exception as e:
@@ -485,29 +930,129 @@ class GameStatsApp(QMainWindow):
             with open(CONFIG_FILE, "w") as file:
                 json.dump(self.config, file, indent=4)
             self.player_name = updated_player_name
+            # Every cached result was computed from the old player's point of view
+            self.analytics_cache.invalidate()
+            self.trends.reset(updated_player_name)
+            if self.aggregate_source is not None:
+                self.aggregate_source.set_player(updated_player_name)
+            self.update_trend_chart()
+            # Outcomes and opponents in the match labels are seen from the tracked player
+            self.match_selector.blockSignals(True)
+            self.match_index.reset(updated_player_name)
+            self.match_selector.setCurrentIndex(0 if self.match_selector.count() > 0 else -1)
+            self.match_selector.blockSignals(False)
+            self.update_analytics_view()
             self.statusBar().showMessage(f"Player name updated to '{updated_player_name}'", 5000)
         else:
             self.statusBar().showMessage("Player name cannot be empty!", 5000)
 
+    def toggle_scoreboard_watcher(self, enabled):
+        """Start or stop polling the screen for the end-of-game scoreboard."""
+        if enabled:
+            if self.scoreboard_watcher is None:
+                from utils import load_config, get_template_bank
+                from capture import get_capture_backend, ScoreboardWatcher
+                config = load_config(CONFIG_FILE)
+                self.scoreboard_watcher = ScoreboardWatcher(
+                    get_capture_backend(config),
+                    get_template_bank(),
+                    self.request_watcher_capture,
+                    interval=config.get("watch_interval", 1.0),
+                    threshold=config.get("watch_threshold", 0.7),
+                    confirm_polls=config.get("watch_confirm_polls", 2),
+                )
+            self.scoreboard_watcher.start()
+            self.watch_stats_timer.start(5000)
+            self.watch_status_label.setText("Watching for the scoreboard...")
+        elif self.scoreboard_watcher is not None:
+            self.scoreboard_watcher.stop()
+            self.watch_stats_timer.stop()
+            self.update_watch_status()
+
+    def update_watch_status(self):
+        if self.scoreboard_watcher is not None:
+            self.watch_status_label.setText(self.scoreboard_watcher.stats())
+
+    def closeEvent(self, event):
+        if self.scoreboard_watcher is not None and self.scoreboard_watcher.is_running():
+            self.scoreboard_watcher.stop()
+        if self.screenshot_thread is not None:
+            # Let the match that is being saved finish writing
+            self.screenshot_thread.wait()
+        self.analytics_cache.save()
+        super().closeEvent(event)
+
+    def claim_capture(self):
+        """Reserve the capture pipeline; False while a screenshot is still being processed."""
+        with self.capture_lock:
+            if self.capture_busy:
+                return False
+            self.capture_busy = True
+            return True
+
+    def request_watcher_capture(self):
+        """Called on the watcher thread; returns False (the watcher stays armed) while a capture is running."""
+        if not self.claim_capture():
+            return False
+        self.scoreboard_detected.emit()
+        return True
+
     def take_screenshot(self):
-        """Trigger the screenshot process."""
+        """Start processing a screenshot on a worker thread."""
+        if not self.claim_capture():
+            # A click while busy would only capture the same scoreboard again
+            self.statusBar().showMessage("Still processing the previous screenshot...", 3000)
+            return
+        self.start_screenshot()
+
+    def start_screenshot(self):
+        """Run the capture pipeline on a worker thread; the caller has claimed it (claim_capture)."""
+        self.screenshot_button.setEnabled(False)
         self.statusBar().showMessage("Processing screenshot...")
         self.progress_bar.setValue(0)
-        QApplication.processEvents()
 
-        try:
-            # Process screenshot and data
-            extracted_data = process_screenshot(self.player_name)
+        self.screenshot_thread = QThread(self)
+        self.screenshot_worker = ScreenshotWorker(self.player_name, self.load_aggregate_data)
+        self.screenshot_worker.moveToThread(self.screenshot_thread)
+        self.screenshot_thread.started.connect(self.screenshot_worker.run)
+        self.screenshot_worker.progress.connect(self.on_screenshot_progress)
+        self.screenshot_worker.succeeded.connect(self.on_screenshot_succeeded)
+        self.screenshot_worker.failed.connect(self.on_screenshot_failed)
+        self.screenshot_worker.succeeded.connect(self.screenshot_thread.quit)
+        self.screenshot_worker.failed.connect(self.screenshot_thread.quit)
+        self.screenshot_thread.finished.connect(self.on_screenshot_thread_finished)
+        self.screenshot_thread.start()
+
+    def on_screenshot_progress(self, percent, message):
+        self.progress_bar.setValue(percent)
+        self.statusBar().showMessage(message)
+
+    def on_screenshot_succeeded(self, result, aggregate_data):
+        if result is None:
+            self.statusBar().showMessage("No scoreboard found on the screen.", 5000)
+        elif result.duplicate:
+            self.statusBar().showMessage(f"This scoreboard is already saved (match {result.uuid}).", 5000)
+        else:
             self.statusBar().showMessage("Screenshot processed successfully!", 5000)
-            self.progress_bar.setValue(100)
+        self.progress_bar.setValue(100)
+        if result is not None:
             self.load_latest_game_data()
 
-            # Reload aggregate data
-            self.aggregate_data = self.load_aggregate_data()
-            self.update_analytics_view()
-        except Exception as e:
-            self.statusBar().showMessage(f"Error: {e}", 5000)
-            self.progress_bar.setValue(0)
+        self.aggregate_data = aggregate_data
+        self.update_analytics_view()
+
+    def on_screenshot_failed(self, error):
+        self.statusBar().showMessage(f"Error: {error}", 5000)
+        self.progress_bar.setValue(0)
+
+    def on_screenshot_thread_finished(self):
+        self.screenshot_worker.deleteLater()
+        self.screenshot_thread.deleteLater()
+        self.screenshot_worker = None
+        self.screenshot_thread = None
+        self.screenshot_button.setEnabled(True)
+        with self.capture_lock:
+            self.capture_busy = False
 
     def open_file(self, file_path):
         if os.path.exists(file_path):
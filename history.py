@@ -0,0 +1,229 @@
+import os
+import sys
+import glob
+import shutil
+import argparse
+import pandas as pd
+
+try:
+    # Optional: without pyarrow the analytics read from the match store instead
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    from pyarrow import fs
+except ImportError:
+    pa = None
+
+# Determine base_path correctly
+if getattr(sys, 'frozen', False):
+    # Running as a bundled executable
+    base_path = os.path.dirname(sys.executable)
+else:
+    # Running in a normal Python environment
+    base_path = os.path.dirname(os.path.abspath(__file__))
+
+DATA_FOLDER = os.path.join(base_path, "data")
+HISTORY_FOLDER = os.path.join(DATA_FOLDER, "history")
+# Written once the history has been seeded from the match store; holds HISTORY_VERSION
+MIGRATED_MARKER = "_migrated"
+# Bump when the schema changes so existing histories are rebuilt from the store
+HISTORY_VERSION = "2"
+
+INT_COLUMNS = ["level", "score", "kills", "damage", "goldSpent"]
+CATEGORY_COLUMNS = ["player", "team", "Victory/Defeat"]
+TEXT_COLUMNS = ["uuid", "row"]
+# Cells that could not be read, as flagged at ingest
+FLAG_COLUMNS = ["invalidCells"]
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+if pa is not None:
+    HISTORY_SCHEMA = pa.schema(
+        [pa.field(column, pa.string()) for column in TEXT_COLUMNS]
+        + [pa.field("player", pa.dictionary(pa.int32(), pa.string()))]
+        + [pa.field(column, pa.int64()) for column in INT_COLUMNS]
+        + [pa.field(column, pa.dictionary(pa.int32(), pa.string())) for column in ["team", "Victory/Defeat"]]
+        + [pa.field("datetime", pa.timestamp("s"))]
+        + [pa.field(column, pa.string()) for column in FLAG_COLUMNS]
+    )
+    PARTITIONING = ds.partitioning(pa.schema([pa.field("month", pa.string())]), flavor="hive")
+    DATASET_SCHEMA = HISTORY_SCHEMA.append(pa.field("month", pa.string()))
+
+
+def history_available():
+    return pa is not None
+
+
+def typed_frame(frame):
+    """Convert player rows (as written to output.csv) to the typed history columns.
+
+    Stats were already parsed and validated at ingest, so this is a dtype
+    cast; everything read back from the history has integer stats and
+    categorical names.
+    """
+    frame = frame.copy()
+    for column in INT_COLUMNS:
+        frame[column] = pd.to_numeric(frame[column], errors="coerce").fillna(0).astype("int64")
+    for column in FLAG_COLUMNS:
+        if column not in frame.columns:
+            frame[column] = ""
+        frame[column] = frame[column].fillna("").astype(str)
+    for column in TEXT_COLUMNS:
+        frame[column] = frame[column].astype(str)
+    for column in CATEGORY_COLUMNS:
+        frame[column] = frame[column].astype(str).astype("category")
+    frame["datetime"] = pd.to_datetime(frame["datetime"], format=DATETIME_FORMAT, errors="coerce")
+    frame["datetime"] = frame["datetime"].fillna(pd.Timestamp.now().floor("s"))
+    return frame[HISTORY_SCHEMA.names]
+
+
+def append_history(frame, folder=HISTORY_FOLDER):
+    """Write new player rows as one Parquet part file per month they fall in."""
+    if pa is None or frame.empty:
+        return
+    frame = typed_frame(frame)
+    months = frame["datetime"].dt.strftime("%Y-%m")
+    for month, rows in frame.groupby(months, sort=False):
+        table = pa.Table.from_pandas(rows, schema=HISTORY_SCHEMA, preserve_index=False)
+        month_folder = os.path.join(folder, f"month={month}")
+        os.makedirs(month_folder, exist_ok=True)
+        part = os.path.join(month_folder, f"part-{rows['uuid'].iloc[0]}-{len(os.listdir(month_folder))}.parquet")
+        # Written under a hidden name first so readers never see a partial file
+        temp_file = os.path.join(month_folder, f".{os.path.basename(part)}.tmp")
+        pq.write_table(table, temp_file)
+        os.replace(temp_file, part)
+    print(f"Appended {len(frame)} rows to the history in {folder}")
+
+
+def read_history(columns=None, start=None, end=None, players=None, folder=HISTORY_FOLDER, paths=None):
+    """Read typed player rows from the history.
+
+    Only the requested `columns` are read, only month partitions overlapping
+    [`start`, `end`) are opened, and `start`/`end`/`players` are pushed down to
+    the Parquet row groups. `paths` limits the read to some of the history's
+    files (e.g. those added since the last read). Files are memory-mapped.
+    """
+    if pa is None:
+        raise RuntimeError("pyarrow is not installed; read from the match store instead.")
+    columns = columns or HISTORY_SCHEMA.names
+    if paths is None and not glob.glob(os.path.join(folder, "month=*", "*.parquet")):
+        paths = []
+    if paths is not None and not paths:
+        return HISTORY_SCHEMA.empty_table().select(columns).to_pandas()
+    dataset = ds.dataset(
+        sorted(paths) if paths is not None else folder, schema=DATASET_SCHEMA, format="parquet",
+        partitioning=PARTITIONING, partition_base_dir=folder if paths is not None else None,
+        filesystem=fs.LocalFileSystem(use_mmap=True),
+    )
+    conditions = []
+    if start is not None:
+        start = pd.Timestamp(start)
+        conditions.append(ds.field("month") >= start.strftime("%Y-%m"))
+        conditions.append(ds.field("datetime") >= pa.scalar(start.to_pydatetime(), pa.timestamp("s")))
+    if end is not None:
+        end = pd.Timestamp(end)
+        conditions.append(ds.field("month") <= end.strftime("%Y-%m"))
+        conditions.append(ds.field("datetime") < pa.scalar(end.to_pydatetime(), pa.timestamp("s")))
+    if players is not None:
+        conditions.append(ds.field("player").isin(list(players)))
+    row_filter = None
+    for condition in conditions:
+        row_filter = condition if row_filter is None else row_filter & condition
+    return dataset.to_table(columns=columns, filter=row_filter).to_pandas()
+
+
+def history_files(folder=HISTORY_FOLDER):
+    """{path: (size, mtime_ns)} of every Parquet file in the history."""
+    files = {}
+    for path in glob.glob(os.path.join(folder, "month=*", "*.parquet")):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        files[path] = (stat.st_size, stat.st_mtime_ns)
+    return files
+
+
+def concat_history(frames):
+    """Concatenate history frames, merging the categories of categorical columns."""
+    frames = [frame for frame in frames if frame is not None]
+    if not frames:
+        return pd.DataFrame()
+    combined = pd.concat(frames, ignore_index=True)
+    for column in frames[0].columns:
+        if all(isinstance(frame[column].dtype, pd.CategoricalDtype) for frame in frames):
+            combined[column] = pd.api.types.union_categoricals(
+                [frame[column] for frame in frames], ignore_order=True
+            )
+    return combined
+
+
+def compact_history(folder=HISTORY_FOLDER):
+    """Merge each month's per-match part files into a single file."""
+    if pa is None:
+        return
+    for month_folder in sorted(glob.glob(os.path.join(folder, "month=*"))):
+        parts = sorted(glob.glob(os.path.join(month_folder, "*.parquet")), key=os.path.getmtime)
+        if len(parts) < 2:
+            continue
+        table = pa.concat_tables([pq.read_table(part, schema=HISTORY_SCHEMA) for part in parts])
+        temp_file = os.path.join(month_folder, ".compacting.tmp")
+        compacted = os.path.join(month_folder, "part-compacted.parquet")
+        pq.write_table(table.unify_dictionaries(), temp_file)
+        # The merged file is in place before any part goes, so a crash never loses rows;
+        # the previous compacted file was just replaced and is not deleted
+        os.replace(temp_file, compacted)
+        for part in parts:
+            if os.path.abspath(part) != os.path.abspath(compacted):
+                os.remove(part)
+        print(f"Compacted {len(parts)} files in {month_folder}")
+
+
+def mark_history_stale(folder=HISTORY_FOLDER):
+    """Make the next ensure_history rebuild the history, e.g. after a failed append."""
+    try:
+        os.remove(os.path.join(folder, MIGRATED_MARKER))
+    except FileNotFoundError:
+        pass
+
+
+def rebuild_history(store, folder=HISTORY_FOLDER):
+    """Recreate the whole history from the match store."""
+    if pa is None:
+        print("pyarrow is not installed; the Parquet history is disabled.")
+        return
+    if os.path.exists(folder):
+        shutil.rmtree(folder)
+    os.makedirs(folder)
+    append_history(store.player_frame(), folder)
+    compact_history(folder)
+    with open(os.path.join(folder, MIGRATED_MARKER), "w") as file:
+        file.write(HISTORY_VERSION)
+
+
+def ensure_history(store, folder=HISTORY_FOLDER):
+    """Seed the history from the match store the first time it is needed, or after a schema change."""
+    if pa is None:
+        return
+    marker = os.path.join(folder, MIGRATED_MARKER)
+    if os.path.exists(marker):
+        with open(marker) as file:
+            if file.read().strip() == HISTORY_VERSION:
+                return
+    rebuild_history(store, folder)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the columnar match history.")
+    parser.add_argument("--rebuild", action="store_true", help="Recreate the history from the match store")
+    parser.add_argument("--compact", action="store_true", help="Merge each month's files into one")
+    args = parser.parse_args()
+
+    from store import get_match_store
+    if args.rebuild:
+        rebuild_history(get_match_store())
+    if args.compact:
+        compact_history()
+
+
+if __name__ == "__main__":
+    main()
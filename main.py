@@ -6,16 +6,18 @@ import shutil
 import pandas as pd
 from datetime import datetime
 from PIL import Image
-import pytesseract
-import pyautogui
 import cv2
 import numpy as np
+from collections import namedtuple
 
 from utils import (
-    generate_uuid, clear_session_folder, load_config, detect_victory_or_defeat,
-    process_middle_control, save_to_csv, save_middle_control_to_csv, append_to_aggregate,
-    extract_text_from_image, save_cropped_image, crop_area
+    generate_uuid, clear_session_folder, load_config, crop_victory_defeat_area, parse_game_outcome,
+    crop_middle_control, parse_middle_control, save_to_csv, save_middle_control_to_csv, append_session_to_aggregate,
+    get_ocr_engine, save_cropped_image, crop_area, get_template_bank,
+    configure_debug_artifacts, scoreboard_hash
 )
+from store import normalize_stats, get_match_store
+from capture import get_capture_backend, capture_scoreboard, scoreboard_size, ScoreboardCapture
 
 # Determine base_path correctly
 if getattr(sys, 'frozen', False):
@@ -33,90 +35,101 @@ LAST_SESSION_FOLDER = os.path.join(DATA_FOLDER, "last_session")
 if not os.path.exists(DATA_FOLDER):
     os.makedirs(DATA_FOLDER)
 
-def process_screenshot(player_name):
-    session_uuid = generate_uuid()
-
-    clear_session_folder(LAST_SESSION_FOLDER)
-
-    config = load_config()
+# Minimum TM_CCOEFF_NORMED score for the scoreboard anchor
+ANCHOR_THRESHOLD = 0.8  # Adjust as needed
 
-    screenshot_path = os.path.join(LAST_SESSION_FOLDER, "screenshot.png")
-    pyautogui.screenshot(screenshot_path)
-    print(f"Screenshot saved: {screenshot_path}")
+# Outcome of processing one scoreboard. `rows` is None when an identical scoreboard
+# was already stored (`duplicate` is then True and `uuid` is the stored match).
+SessionResult = namedtuple("SessionResult", ["uuid", "rows", "duplicate", "image_hash"])
 
-    # Open the screenshot image
-    image = Image.open(screenshot_path)
+def _no_progress(percent, message):
+    pass
 
-    # Convert the screenshot to OpenCV format
-    screenshot_cv = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
+def process_screenshot(player_name, progress=None):
+    """Capture the screen and process the scoreboard on it.
 
-    # List of template image filenames to try (you can add more as needed)
-    template_filenames = [
-        "team1_template_undead.png",
-        "team1_template_nightelf.png",
-        # "team1_template_human.png",
-        # "team1_template_orc.png"
-    ]
+    `progress(percent, message)` is called as each stage starts.
+    """
+    progress = progress or _no_progress
+    config = load_config()
 
-    threshold = 0.8  # Adjust as needed
-    best_match_val = 0
-    best_match_loc = None
+    # Created before the session folder is cleared: the glyph atlas learns from the previous session's crops
+    get_ocr_engine(config)
 
-    # Attempt to find the top-left corner using multiple templates
-    for template_name in template_filenames:
-        template_path = os.path.join(base_path, template_name)
-        template = cv2.imread(template_path, cv2.IMREAD_COLOR)
-        if template is None:
-            print(f"Template file not found: {template_path}")
-            continue
+    clear_session_folder(LAST_SESSION_FOLDER)
 
-        # Perform template matching
-        result = cv2.matchTemplate(screenshot_cv, template, cv2.TM_CCOEFF_NORMED)
-        _, max_val, _, max_loc = cv2.minMaxLoc(result)
+    configure_debug_artifacts(config.get("debug_artifacts", "full"))
+
+    # Grab the screen straight into memory (only the scoreboard region once its position is known)
+    progress(5, "Capturing the screen and matching the scoreboard anchor...")
+    capture = capture_scoreboard(get_capture_backend(config), get_template_bank(), ANCHOR_THRESHOLD)
+    return process_capture(capture, player_name, config, LAST_SESSION_FOLDER, progress=progress)
+
+def process_image(image, player_name, session_folder=LAST_SESSION_FOLDER, captured_at=None, aggregate=True, config=None,
+                  progress=None):
+    """Run the pipeline on a saved screenshot instead of the live screen.
+
+    `image` is a file path, a PIL image or a BGR array of a full screenshot.
+    Session files are written to `session_folder` (cleared first), rows are
+    stamped with `captured_at` (default: now), and with `aggregate=False` the
+    aggregate files are left untouched so the caller can write them in bulk.
+    `config` overrides the settings read from config.json. Returns a
+    SessionResult, or None when no scoreboard was found.
+    """
+    progress = progress or _no_progress
+    config = config or load_config()
+    get_ocr_engine(config)
+    clear_session_folder(session_folder)
+    configure_debug_artifacts(config.get("debug_artifacts", "full"))
+
+    if isinstance(image, str):
+        frame = cv2.imread(image, cv2.IMREAD_COLOR)
+        if frame is None:
+            raise ValueError(f"Could not read image: {image}")
+    elif isinstance(image, Image.Image):
+        frame = cv2.cvtColor(np.array(image.convert("RGB")), cv2.COLOR_RGB2BGR)
+    else:
+        frame = image
+
+    progress(5, "Matching the scoreboard anchor...")
+    top_left, score = get_template_bank().match(frame, ANCHOR_THRESHOLD)
+    board = None
+    if top_left is not None:
+        board_width, board_height = scoreboard_size((frame.shape[1], frame.shape[0]))
+        board = frame[top_left[1]:top_left[1] + board_height, top_left[0]:top_left[0] + board_width]
+    capture = ScoreboardCapture(frame, board, top_left, score)
+    return process_capture(capture, player_name, config, session_folder, captured_at, aggregate, progress)
+
+def process_capture(capture, player_name, config, session_folder, captured_at=None, aggregate=True, progress=None):
+    progress = progress or _no_progress
+    session_uuid = generate_uuid()
+    captured_at = captured_at or datetime.now()
 
-        print(f"Template '{template_name}' match value: {max_val}")
-        if max_val > threshold and max_val > best_match_val:
-            best_match_val = max_val
-            best_match_loc = max_loc
+    save_cropped_image(capture.frame, session_folder, "screenshot.png")
 
     # Check if we found a suitable match
-    if best_match_loc is None:
+    if capture.top_left is None:
         print("Top-left corner not detected with any template. Ensure the templates match the screenshot.")
         return
 
     # Top-left corner of the matched region
-    top_left = best_match_loc
-    print(f"Top-left corner detected at: {top_left} with a score of {best_match_val}")
-
-    # Crop the region starting from the detected top-left corner
-    cropped_image = screenshot_cv[
-        top_left[1]:top_left[1] + int(915 / 1440 * screenshot_cv.shape[0]),  # Height
-        top_left[0]:top_left[0] + int(1665 / 2560 * screenshot_cv.shape[1])  # Width
-    ]
-
-    # Convert cropped image back to PIL format for further processing
-    cropped_image_pil = Image.fromarray(cv2.cvtColor(cropped_image, cv2.COLOR_BGR2RGB))
+    top_left = capture.top_left
+    print(f"Top-left corner detected at: {top_left} with a score of {capture.score}")
 
     # Save the cropped scoreboard image for debugging
-    save_cropped_image(cropped_image_pil, LAST_SESSION_FOLDER, "scoreboard_cropped.png")
+    save_cropped_image(capture.board, session_folder, "scoreboard_cropped.png")
 
-    # Detect Victory/Defeat
-    victory_defeat_position = config["victory_defeat_position"]
-    game_outcome = detect_victory_or_defeat(cropped_image_pil, victory_defeat_position)
+    # OCR only needs luminance, so the cells are cut from a grayscale copy of the scoreboard
+    cropped_image_pil = Image.fromarray(cv2.cvtColor(capture.board, cv2.COLOR_BGR2GRAY))
 
     rows = config["rows"]
     columns = config["columns"]
-    extracted_data = []
+    numeric_columns = ["Level", "Score", "Kills", "Damage Done", "Gold Spent"]
 
-    # Process each player row and extract stats
+    # Crop every cell first so all of them can be recognised together
+    cells = []
+    modes = []
     for i, row in enumerate(rows):
-        print(f"Processing Row {i + 1}")
-        row_data = [f"Row {i + 1}"]
-
-        # Determine the player's team
-        team = "Team 1" if i < 3 else "Team 2"
-
-        # Extract the columns as before
         for column_name, column_coords in columns.items():
             cropped_cell = crop_area(
                 cropped_image_pil,
@@ -127,17 +140,68 @@ def process_screenshot(player_name):
             )
             save_cropped_image(
                 cropped_cell,
-                LAST_SESSION_FOLDER,
+                session_folder,
                 f"Row_{i+1}_{column_name.replace(' ', '_')}.png"
             )
+            cells.append(cropped_cell)
+            modes.append("numeric" if column_name in numeric_columns else "text")
+
+    middle_control_cells = crop_middle_control(cropped_image_pil, config["middle_control"], session_folder)
+    for _, cropped_team_area in middle_control_cells:
+        cells.append(cropped_team_area)
+        modes.append("time")
+
+    cells.append(crop_victory_defeat_area(cropped_image_pil, config["victory_defeat_position"]))
+    modes.append("text")
+
+    # A scoreboard that was already saved (e.g. the button pressed twice) skips OCR entirely;
+    # its thresholded cells must match pixel for pixel, so a new game with the same layout never does
+    progress(15, "Checking whether this scoreboard is already saved...")
+    image_hash = scoreboard_hash(cells)
+    existing_uuid = get_match_store().find_duplicate(
+        image_hash=image_hash, near=captured_at, window_minutes=config.get("duplicate_window_minutes", 60)
+    )
+    if existing_uuid is not None:
+        print(f"Scoreboard already saved as match {existing_uuid}; skipping OCR.")
+        show_stored_match(existing_uuid, session_folder)
+        return SessionResult(existing_uuid, None, True, image_hash)
+
+    # Cells are in row order, then middle control, then the outcome banner
+    row_cells = len(rows) * len(columns)
+
+    def ocr_progress(done, total):
+        if done < row_cells:
+            message = f"Reading row {done // len(columns) + 1} of {len(rows)}..."
+        elif done < total - 1:
+            message = "Reading middle control..."
+        else:
+            message = "Reading the match outcome..."
+        progress(20 + 65 * done // total, message)
+
+    progress(20, f"Reading row 1 of {len(rows)}...")
+    texts = get_ocr_engine(config).recognize(cells, modes, progress=ocr_progress)
+
+    # Detect Victory/Defeat
+    game_outcome = parse_game_outcome(texts.pop())
+
+    extracted_data = []
+    for i, row in enumerate(rows):
+        print(f"Processing Row {i + 1}")
+        row_data = [f"Row {i + 1}"]
+
+        # Determine the player's team
+        team = "Team 1" if i < 3 else "Team 2"
 
-            is_numeric = column_name in ["Level", "Score", "Kills", "Damage Done", "Gold Spent"]
-            extracted_text = extract_text_from_image(cropped_cell, is_numeric=is_numeric)
-            row_data.append(extracted_text)
+        # Parse the OCR text into a player name and integer stats, flagging cells that could not be read
+        start = i * len(columns)
+        player, stats, invalid_cells = normalize_stats(texts[start], texts[start + 1:start + len(columns)])
+        row_data.append(player)
+        row_data.extend(stats)
 
         row_data.append(team)
         row_data.append(game_outcome) 
-        row_data.append(datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+        row_data.append(captured_at.strftime("%Y-%m-%d %H:%M:%S"))
+        row_data.append(invalid_cells)
         extracted_data.append(row_data)
         
     # Adjust victory/defeat assignments based on the user's team
@@ -161,18 +225,32 @@ def process_screenshot(player_name):
                     row[8] = opposing_result
 
     # Save current player data to file
-    player_data_file = os.path.join(LAST_SESSION_FOLDER, "output.csv")
+    player_data_file = os.path.join(session_folder, "output.csv")
     save_to_csv(extracted_data, player_data_file, session_uuid)
 
     # Process middle control
-    middle_control = config["middle_control"]
-    middle_control_data = process_middle_control(cropped_image_pil, middle_control, LAST_SESSION_FOLDER, session_uuid)
-    middle_control_file = os.path.join(LAST_SESSION_FOLDER, "middle_control.csv")
+    middle_control_texts = texts[len(rows) * len(columns):]
+    middle_control_data = [
+        parse_middle_control(team, text, session_uuid)
+        for (team, _), text in zip(middle_control_cells, middle_control_texts)
+    ]
+    middle_control_file = os.path.join(session_folder, "middle_control.csv")
     save_middle_control_to_csv(middle_control_data, middle_control_file)
 
     # Aggregate data
-    append_to_aggregate(os.path.join(DATA_FOLDER, "aggregate_player_data.csv"), player_data_file)
-    append_to_aggregate(os.path.join(DATA_FOLDER, "aggregate_middle_control.csv"), middle_control_file)
+    if aggregate:
+        progress(90, "Saving the match...")
+        skipped = append_session_to_aggregate(player_data_file, middle_control_file, {session_uuid: image_hash})
+        if session_uuid in skipped:
+            # Same rows as a stored match, just captured differently
+            print(f"Scoreboard already saved as match {skipped[session_uuid]}.")
+            return SessionResult(skipped[session_uuid], extracted_data, True, image_hash)
 
     print(f"Session UUID: {session_uuid}")
-    return extracted_data
+    return SessionResult(session_uuid, extracted_data, False, image_hash)
+
+def show_stored_match(match_uuid, session_folder):
+    """Write a stored match to the session's output.csv so it shows as the latest game."""
+    match_frame = get_match_store().match_frame(match_uuid)
+    os.makedirs(session_folder, exist_ok=True)
+    match_frame.to_csv(os.path.join(session_folder, "output.csv"), index=False)
@@ -0,0 +1,684 @@
+import os
+import sys
+import csv
+import hashlib
+import sqlite3
+import argparse
+import threading
+import pandas as pd
+
+# Determine base_path correctly
+if getattr(sys, 'frozen', False):
+    # Running as a bundled executable
+    base_path = os.path.dirname(sys.executable)
+else:
+    # Running in a normal Python environment
+    base_path = os.path.dirname(os.path.abspath(__file__))
+
+DATA_FOLDER = os.path.join(base_path, "data")
+DB_FILE = os.path.join(DATA_FOLDER, "matches.db")
+PLAYER_DATA_CSV = os.path.join(DATA_FOLDER, "aggregate_player_data.csv")
+MIDDLE_CONTROL_CSV = os.path.join(DATA_FOLDER, "aggregate_middle_control.csv")
+# Seconds to wait for another process's write transaction (e.g. its first-open migration)
+MIGRATION_TIMEOUT = 300
+
+# CSV header -> table column, in CSV order
+PLAYER_COLUMNS = {
+    "uuid": "uuid",
+    "row": "row",
+    "player": "player",
+    "level": "level",
+    "score": "score",
+    "kills": "kills",
+    "damage": "damage",
+    "goldSpent": "goldSpent",
+    "team": "team",
+    "Victory/Defeat": "outcome",
+    "datetime": "datetime",
+    "invalidCells": "invalidCells",
+}
+MIDDLE_CONTROL_COLUMNS = {
+    "uuid": "uuid",
+    "team": "team",
+    "timeMMSS": "timeMMSS",
+    "middleControlSeconds": "middleControlSeconds",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS matches (
+    id INTEGER PRIMARY KEY,
+    uuid TEXT NOT NULL UNIQUE,
+    datetime TEXT
+);
+CREATE TABLE IF NOT EXISTS player_rows (
+    id INTEGER PRIMARY KEY,
+    uuid TEXT NOT NULL,
+    "row" TEXT,
+    player TEXT,
+    level INTEGER,
+    score INTEGER,
+    kills INTEGER,
+    damage INTEGER,
+    goldSpent INTEGER,
+    team TEXT,
+    outcome TEXT,
+    datetime TEXT,
+    invalidCells TEXT
+);
+CREATE TABLE IF NOT EXISTS middle_control (
+    id INTEGER PRIMARY KEY,
+    uuid TEXT NOT NULL,
+    team TEXT,
+    timeMMSS TEXT,
+    middleControlSeconds INTEGER
+);
+CREATE TABLE IF NOT EXISTS fingerprints (
+    uuid TEXT PRIMARY KEY,
+    image_hash TEXT,
+    content_hash TEXT,
+    datetime TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_fingerprints_image_hash ON fingerprints(image_hash);
+CREATE INDEX IF NOT EXISTS idx_fingerprints_content_hash ON fingerprints(content_hash);
+CREATE TABLE IF NOT EXISTS player_totals (
+    player TEXT PRIMARY KEY,
+    rows INTEGER NOT NULL,
+    games INTEGER NOT NULL,
+    level INTEGER NOT NULL,
+    score INTEGER NOT NULL,
+    kills INTEGER NOT NULL,
+    damage INTEGER NOT NULL,
+    goldSpent INTEGER NOT NULL,
+    wins INTEGER NOT NULL,
+    losses INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_matches_datetime ON matches(datetime);
+CREATE INDEX IF NOT EXISTS idx_player_rows_uuid ON player_rows(uuid);
+CREATE INDEX IF NOT EXISTS idx_player_rows_player ON player_rows(player);
+CREATE INDEX IF NOT EXISTS idx_player_rows_datetime ON player_rows(datetime);
+CREATE INDEX IF NOT EXISTS idx_middle_control_uuid ON middle_control(uuid);
+"""
+
+# Plausible range of each stat; anything outside it is treated as a misread. Adjust as needed
+STAT_RANGES = {
+    "level": (0, 100),
+    "score": (0, 1_000_000),
+    "kills": (0, 100_000),
+    "damage": (0, 100_000_000),
+    "goldSpent": (0, 1_000_000),
+}
+STAT_COLUMNS = list(STAT_RANGES)
+# Letters Tesseract returns for digits, and thousands separators
+OCR_DIGIT_FIXES = str.maketrans({"O": "0", "o": "0", "D": "0", "Q": "0", "l": "1", "I": "1", "i": "1", "|": "1", "S": "5", "B": "8"})
+THOUSANDS_SEPARATORS = str.maketrans("", "", ",.' ")
+
+
+def parse_stat(column, text):
+    """Parse one OCR'd stat into (value, valid). Unreadable or out-of-range values become (0, False)."""
+    if isinstance(text, int):
+        cleaned = str(text)
+    else:
+        cleaned = str(text or "").strip().translate(OCR_DIGIT_FIXES).translate(THOUSANDS_SEPARATORS)
+    if not (cleaned.isascii() and cleaned.isdigit()):
+        return 0, False
+    value = int(cleaned)
+    low, high = STAT_RANGES[column]
+    if not low <= value <= high:
+        return 0, False
+    return value, True
+
+
+def normalize_stats(player, stats):
+    """Type one scoreboard row: `stats` are the OCR texts in STAT_COLUMNS order.
+
+    Returns the cleaned player name, the integer stats, and the names of the
+    cells that could not be read (joined with ";" for the invalidCells column).
+    """
+    player = str(player or "").strip()
+    invalid = [] if player else ["player"]
+    values = []
+    for column, text in zip(STAT_COLUMNS, stats):
+        value, valid = parse_stat(column, text)
+        values.append(value)
+        if not valid:
+            invalid.append(column)
+    return player, values, ";".join(invalid)
+
+
+# Columns that identify a scoreboard's content (not when or how it was saved)
+CONTENT_COLUMNS = ["row", "player", *STAT_COLUMNS, "team", "outcome"]
+
+
+def _content_value(column, value):
+    """One cell in the canonical form hashed by content_hash: stats as integers, text stripped."""
+    if column in STAT_COLUMNS:
+        return str(_as_int(value))
+    return "" if value is None else str(value).strip()
+
+
+def content_hash(rows):
+    """Hash the normalized rows of one match, given as dicts keyed by table column.
+
+    Values are put in one canonical form first, so rows hash the same whether
+    they come from output.csv (text) or from the store (integers). Returns
+    None when no player name was read, so failed reads of different games are
+    never mistaken for each other.
+    """
+    if not any(_content_value("player", row.get("player")) for row in rows):
+        return None
+    lines = sorted(
+        "\x1f".join(_content_value(column, row.get(column)) for column in CONTENT_COLUMNS) for row in rows
+    )
+    return hashlib.sha1("\n".join(lines).encode("utf-8")).hexdigest()
+
+# Running per-player totals kept in player_totals: row count, distinct games, stat sums, wins and losses
+TOTAL_COLUMNS = ["rows", "games", *STAT_COLUMNS, "wins", "losses"]
+# The same totals recomputed from every stored row
+TOTALS_QUERY = f"""
+SELECT player, COUNT(*) AS rows, COUNT(DISTINCT uuid) AS games,
+    {", ".join(f'COALESCE(SUM("{column}"), 0) AS "{column}"' for column in STAT_COLUMNS)},
+    SUM(outcome = 'Victory') AS wins, SUM(outcome = 'Defeat') AS losses
+FROM player_rows GROUP BY player
+"""
+
+
+def _as_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _select_list(columns):
+    """SELECT list that hands columns back under their CSV names."""
+    return ", ".join(f'"{column}" AS "{header}"' for header, column in columns.items())
+
+
+def _insert_sql(table, columns):
+    names = ", ".join(f'"{column}"' for column in columns.values())
+    placeholders = ", ".join("?" for _ in columns)
+    return f'INSERT INTO {table} ({names}) VALUES ({placeholders})'
+
+
+def _align(header, rows, columns):
+    """Reorder CSV rows given under `header` into the table's column order."""
+    positions = [header.index(name) if name in header else None for name in columns]
+    return [
+        [row[i] if i is not None and i < len(row) else None for i in positions]
+        for row in rows
+    ]
+
+
+class MatchStore:
+    """Embedded SQLite store for ingested matches.
+
+    Player rows and middle-control rows live in indexed tables (by uuid, player
+    and datetime) so the GUI can fetch one match or one player without reading
+    the whole history. The aggregate CSVs (`legacy_csvs`) are imported once on
+    first use and can be regenerated from the store with `export_csv`.
+    """
+
+    def __init__(self, path=DB_FILE, legacy_csvs=(PLAYER_DATA_CSV, MIDDLE_CONTROL_CSV)):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Other processes (backfill workers) may hold the write lock for a whole migration
+        self._connection = sqlite3.connect(path, timeout=MIGRATION_TIMEOUT, check_same_thread=False)
+        self._lock = threading.RLock()
+        with self._lock, self._connection:
+            self._connection.executescript(SCHEMA)
+            existing = {row[1] for row in self._connection.execute("PRAGMA table_info(player_rows)")}
+            if "invalidCells" not in existing:
+                self._connection.execute("ALTER TABLE player_rows ADD COLUMN invalidCells TEXT")
+        self._migrate_once("csv_migrated", lambda: self.migrate_from_csv(*legacy_csvs))
+        self._migrate_once("stats_normalized", self.normalize_existing_rows)
+        # Content hashes before v2 were not computed from canonical values; all are recomputed once
+        self._migrate_once("fingerprinted_v2", self.fingerprint_existing_matches)
+        self._migrate_once("totals_built", self._rebuild_totals)
+
+    def _migrate_once(self, key, migrate):
+        """Run a one-time migration unless the meta flag `key` is set.
+
+        BEGIN IMMEDIATE takes the database write lock before the flag is read,
+        and the migration and the flag are committed together, so when several
+        processes open a fresh store at once (e.g. backfill workers) only the
+        first one migrates and the others see the flag.
+        """
+        if self.get_meta(key) is not None:
+            return
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                if self.get_meta(key) is None:
+                    migrate()
+                    self._set_meta(key, 1)
+                self._connection.commit()
+            except BaseException:
+                self._connection.rollback()
+                raise
+
+    def get_meta(self, key):
+        with self._lock:
+            row = self._connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self._connection.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, str(value)),
+        )
+
+    def _bump_version(self):
+        """Mark the stored data as changed (called inside every write transaction)."""
+        self._connection.execute(
+            "INSERT INTO meta (key, value) VALUES ('data_version', '1') "
+            "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1"
+        )
+
+    def data_version(self):
+        """A number that changes whenever rows or totals change, from any process."""
+        return int(self.get_meta("data_version") or 0)
+
+    def _duplicate_of(self, image_hash=None, content_hash=None, near=None, window_minutes=None):
+        """UUID of a stored match with the same scoreboard image (within the window) or the same content."""
+        if image_hash is not None:
+            query = "SELECT uuid, datetime FROM fingerprints WHERE image_hash = ?"
+            for uuid, stored_at in self._connection.execute(query, (image_hash,)):
+                if near is None or window_minutes is None or stored_at is None:
+                    return uuid
+                stored_at = pd.to_datetime(stored_at, errors="coerce")
+                if not pd.isna(stored_at) and abs(stored_at - pd.Timestamp(near)) <= pd.Timedelta(minutes=window_minutes):
+                    return uuid
+        if content_hash is not None:
+            row = self._connection.execute(
+                "SELECT uuid FROM fingerprints WHERE content_hash = ?", (content_hash,)
+            ).fetchone()
+            if row:
+                return row[0]
+        return None
+
+    def find_duplicate(self, image_hash=None, content_hash=None, near=None, window_minutes=None):
+        """Look up an already stored copy of a scoreboard (an index lookup on either hash).
+
+        An image hash only matches captures within `window_minutes` of `near`;
+        a content hash matches regardless of time.
+        """
+        with self._lock:
+            return self._duplicate_of(image_hash, content_hash, near, window_minutes)
+
+    def _insert(self, player_header, player_rows, middle_control_header, middle_control_rows,
+                image_hashes=None, deduplicate=True):
+        """Insert rows, skipping matches whose content is already stored.
+
+        With `deduplicate=False` (the CSV import, whose stats are not normalized
+        yet) every match is inserted and none is fingerprinted;
+        fingerprint_existing_matches hashes them once they are normalized.
+        Returns {skipped uuid: uuid of the stored copy}.
+        """
+        image_hashes = image_hashes or {}
+        player_rows = _align(player_header, player_rows, PLAYER_COLUMNS) if player_rows else []
+        names = list(PLAYER_COLUMNS.values())
+        uuid_index = names.index("uuid")
+        datetime_index = names.index("datetime")
+
+        by_match = {}
+        for row in player_rows:
+            by_match.setdefault(row[uuid_index], []).append(row)
+
+        skipped = {}
+        fingerprints = []
+        batch_digests = {}
+        for uuid, rows in (by_match.items() if deduplicate else ()):
+            digest = content_hash([dict(zip(names, row)) for row in rows])
+            if digest is not None:
+                existing = batch_digests.get(digest) or self._duplicate_of(content_hash=digest)
+                if existing is not None and existing != uuid:
+                    skipped[uuid] = existing
+                    continue
+                batch_digests[digest] = uuid
+            fingerprints.append((uuid, image_hashes.get(uuid), digest, rows[0][datetime_index]))
+
+        player_rows = [row for row in player_rows if row[uuid_index] not in skipped]
+        if player_rows:
+            # A batch of duplicates changes nothing, so cached analytics stay valid
+            self._bump_version()
+        self._connection.executemany(
+            "INSERT OR IGNORE INTO matches (uuid, datetime) VALUES (?, ?)",
+            [(uuid, rows[0][datetime_index]) for uuid, rows in by_match.items() if uuid not in skipped],
+        )
+        self._connection.executemany(_insert_sql("player_rows", PLAYER_COLUMNS), player_rows)
+        self._connection.executemany(
+            "INSERT OR REPLACE INTO fingerprints (uuid, image_hash, content_hash, datetime) VALUES (?, ?, ?, ?)",
+            fingerprints,
+        )
+        self._add_to_totals(player_rows)
+        if middle_control_rows:
+            middle_control_rows = _align(middle_control_header, middle_control_rows, MIDDLE_CONTROL_COLUMNS)
+            uuid_index = list(MIDDLE_CONTROL_COLUMNS.values()).index("uuid")
+            self._connection.executemany(
+                _insert_sql("middle_control", MIDDLE_CONTROL_COLUMNS),
+                [row for row in middle_control_rows if row[uuid_index] not in skipped],
+            )
+        return skipped
+
+    def _add_to_totals(self, player_rows):
+        """Add newly inserted rows (in table column order) to player_totals."""
+        names = list(PLAYER_COLUMNS.values())
+        deltas = {}
+        games = set()
+        for row in player_rows:
+            values = dict(zip(names, row))
+            delta = deltas.setdefault(values["player"], dict.fromkeys(TOTAL_COLUMNS, 0))
+            delta["rows"] += 1
+            if (values["player"], values["uuid"]) not in games:
+                games.add((values["player"], values["uuid"]))
+                delta["games"] += 1
+            for column in STAT_COLUMNS:
+                delta[column] += _as_int(values[column])
+            delta["wins"] += values["outcome"] == "Victory"
+            delta["losses"] += values["outcome"] == "Defeat"
+        if not deltas:
+            return
+        column_list = ", ".join(f'"{column}"' for column in ["player", *TOTAL_COLUMNS])
+        placeholders = ", ".join("?" for _ in range(len(TOTAL_COLUMNS) + 1))
+        updates = ", ".join(f'"{column}" = "{column}" + excluded."{column}"' for column in TOTAL_COLUMNS)
+        self._connection.executemany(
+            f"INSERT INTO player_totals ({column_list}) VALUES ({placeholders}) "
+            f"ON CONFLICT(player) DO UPDATE SET {updates}",
+            [[player, *(delta[column] for column in TOTAL_COLUMNS)] for player, delta in deltas.items()],
+        )
+
+    def rebuild_player_totals(self):
+        """Recompute player_totals from every stored row."""
+        with self._lock, self._connection:
+            self._rebuild_totals()
+            self._set_meta("totals_built", 1)
+
+    def _rebuild_totals(self):
+        self._connection.execute("DELETE FROM player_totals")
+        self._connection.execute(
+            f'INSERT INTO player_totals (player, {", ".join(TOTAL_COLUMNS)}) {TOTALS_QUERY}'
+        )
+        self._bump_version()
+        print("Rebuilt the per-player totals")
+
+    def check_player_totals(self):
+        """Compare player_totals with a full recomputation; returns [(player, column, stored, expected)]."""
+        with self._lock:
+            stored = {row[0]: row[1:] for row in self._connection.execute(
+                f'SELECT player, {", ".join(TOTAL_COLUMNS)} FROM player_totals'
+            )}
+            expected = {row[0]: row[1:] for row in self._connection.execute(TOTALS_QUERY)}
+        mismatches = []
+        for player in sorted(set(stored) | set(expected), key=str):
+            stored_values = stored.get(player, (None,) * len(TOTAL_COLUMNS))
+            expected_values = expected.get(player, (None,) * len(TOTAL_COLUMNS))
+            for column, stored_value, expected_value in zip(TOTAL_COLUMNS, stored_values, expected_values):
+                if stored_value != expected_value:
+                    mismatches.append((player, column, stored_value, expected_value))
+        return mismatches
+
+    def player_totals(self):
+        """Lifetime totals per player, highest total score first."""
+        with self._lock:
+            return pd.read_sql_query(
+                f'SELECT player, {", ".join(TOTAL_COLUMNS)} FROM player_totals ORDER BY score DESC',
+                self._connection,
+            )
+
+    def ingest(self, player_header=None, player_rows=(), middle_control_header=None, middle_control_rows=(),
+               image_hashes=None):
+        """Store the rows of one or more matches in a single transaction.
+
+        Rows are lists in the order of their CSV header, exactly as written to
+        output.csv / middle_control.csv. `image_hashes` maps a match uuid to the
+        perceptual hash of its scoreboard. Matches whose rows are already stored
+        are skipped; returns {skipped uuid: uuid of the stored copy}.
+        """
+        with self._lock, self._connection:
+            skipped = self._insert(player_header, player_rows, middle_control_header, middle_control_rows, image_hashes)
+        print(f"Stored {len(player_rows)} player rows and {len(middle_control_rows)} middle control rows in {self.path}")
+        if skipped:
+            print(f"Skipped {len(skipped)} duplicate matches: {skipped}")
+        return skipped
+
+    def migrate_from_csv(self, player_csv=PLAYER_DATA_CSV, middle_control_csv=MIDDLE_CONTROL_CSV):
+        """Import the existing aggregate CSVs (runs inside _migrate_once's transaction)."""
+        def read(path):
+            if not os.path.exists(path):
+                return [], []
+            with open(path, newline="") as file:
+                reader = csv.reader(file)
+                return next(reader, []), list(reader)
+
+        player_header, player_rows = read(player_csv)
+        middle_control_header, middle_control_rows = read(middle_control_csv)
+        if player_rows or middle_control_rows:
+            # Not fingerprinted here: the stats are normalized first, then fingerprint_existing_matches hashes them
+            self._insert(player_header, player_rows, middle_control_header, middle_control_rows, deduplicate=False)
+        print(f"Migrated {len(player_rows)} player rows and {len(middle_control_rows)} middle control rows into {self.path}")
+
+    def normalize_existing_rows(self):
+        """Type the stats of rows stored before ingest-time normalization (runs inside _migrate_once's transaction)."""
+        stat_list = ", ".join(f'"{column}"' for column in STAT_COLUMNS)
+        rows = self._connection.execute(
+            f"SELECT id, player, {stat_list} FROM player_rows WHERE invalidCells IS NULL"
+        ).fetchall()
+        updates = []
+        for row_id, player, *stats in rows:
+            player, values, invalid = normalize_stats(player, stats)
+            updates.append([player, *values, invalid, row_id])
+        assignments = ", ".join(f'"{column}" = ?' for column in ["player", *STAT_COLUMNS, "invalidCells"])
+        self._connection.executemany(f"UPDATE player_rows SET {assignments} WHERE id = ?", updates)
+        self._bump_version()
+        print(f"Normalized the stats of {len(updates)} stored player rows")
+
+    def fingerprint_existing_matches(self):
+        """(Re)compute the content hash of every stored match from its normalized rows.
+
+        Runs inside _migrate_once's transaction; image hashes already recorded are kept.
+        """
+        names = list(PLAYER_COLUMNS.values())
+        column_list = ", ".join(f'"{name}"' for name in names)
+        cursor = self._connection.execute(f"SELECT {column_list} FROM player_rows ORDER BY id")
+        by_match = {}
+        for row in cursor:
+            by_match.setdefault(row[names.index("uuid")], []).append(dict(zip(names, row)))
+        self._connection.executemany(
+            "INSERT INTO fingerprints (uuid, image_hash, content_hash, datetime) VALUES (?, NULL, ?, ?) "
+            "ON CONFLICT(uuid) DO UPDATE SET content_hash = excluded.content_hash",
+            [(uuid, content_hash(rows), rows[0]["datetime"]) for uuid, rows in by_match.items()],
+        )
+        print(f"Fingerprinted {len(by_match)} stored matches")
+
+    def player_frame(self):
+        """Every player row, in ingestion order, under the aggregate CSV column names."""
+        with self._lock:
+            return pd.read_sql_query(f"SELECT {_select_list(PLAYER_COLUMNS)} FROM player_rows ORDER BY id", self._connection)
+
+    def player_rows_since(self, after_id=0):
+        """Player rows with an id above `after_id` (the rows added since a previous read), with their "id"."""
+        with self._lock:
+            return pd.read_sql_query(
+                f"SELECT id, {_select_list(PLAYER_COLUMNS)} FROM player_rows WHERE id > ? ORDER BY id",
+                self._connection, params=(after_id,),
+            )
+
+    def last_player_row_id(self):
+        with self._lock:
+            return self._connection.execute("SELECT COALESCE(MAX(id), 0) FROM player_rows").fetchone()[0]
+
+    def match_frame(self, uuid):
+        """The player rows of one match (an index lookup on uuid)."""
+        with self._lock:
+            return pd.read_sql_query(
+                f"SELECT {_select_list(PLAYER_COLUMNS)} FROM player_rows WHERE uuid = ? ORDER BY id",
+                self._connection, params=(uuid,),
+            )
+
+    def match_summaries(self, player, after_id=0):
+        """One row per match stored after match id `after_id`, in ingestion order.
+
+        Gives each match's id, uuid, datetime, the id range of its player rows,
+        `player`'s team and outcome in it (None if they did not play), and the
+        roster as "team:player" entries joined with "|".
+        """
+        with self._lock:
+            return pd.read_sql_query(
+                """
+                SELECT m.id, m.uuid, m.datetime,
+                    MIN(p.id) AS first_row, MAX(p.id) AS last_row,
+                    MAX(CASE WHEN p.player = ? THEN p.team END) AS team,
+                    MAX(CASE WHEN p.player = ? THEN p.outcome END) AS outcome,
+                    GROUP_CONCAT(p.team || ':' || p.player, '|') AS roster
+                FROM matches m JOIN player_rows p ON p.uuid = m.uuid
+                WHERE m.id > ?
+                GROUP BY m.id ORDER BY m.id
+                """,
+                self._connection, params=(player, player, after_id),
+            )
+
+    def match_rows(self, uuid, first_row, last_row):
+        """The player rows of one match, read as a primary-key range (see match_summaries)."""
+        with self._lock:
+            return pd.read_sql_query(
+                f"SELECT {_select_list(PLAYER_COLUMNS)} FROM player_rows "
+                "WHERE id BETWEEN ? AND ? AND uuid = ? ORDER BY id",
+                self._connection, params=(first_row, last_row, uuid),
+            )
+
+    def export_csv(self, player_csv=PLAYER_DATA_CSV, middle_control_csv=MIDDLE_CONTROL_CSV):
+        """Rewrite the aggregate CSVs from the store."""
+        for path, table, columns in (
+            (player_csv, "player_rows", PLAYER_COLUMNS),
+            (middle_control_csv, "middle_control", MIDDLE_CONTROL_COLUMNS),
+        ):
+            temp_path = path + ".tmp"
+            with self._lock, open(temp_path, mode="w", newline="") as file:
+                writer = csv.writer(file)
+                writer.writerow(list(columns))
+                writer.writerows(self._connection.execute(f"SELECT {_select_list(columns)} FROM {table} ORDER BY id"))
+            os.replace(temp_path, path)
+            print(f"Exported {table} to {path}")
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+# Aggregate files whose header has been checked: path -> (header, (size, mtime) after our last write)
+_aggregate_headers = {}
+
+
+def _aggregate_header(data_file):
+    """Header of an aggregate CSV, or None if it does not exist yet.
+
+    Only the first line and the last byte are read, and not even that while the
+    file is unchanged since our last append. A missing final newline is added so
+    appended rows never run into the last existing one.
+    """
+    try:
+        stat = os.stat(data_file)
+    except FileNotFoundError:
+        return None
+    if stat.st_size == 0:
+        return None
+    cached = _aggregate_headers.get(data_file)
+    if cached is not None and cached[1] == (stat.st_size, stat.st_mtime_ns):
+        return cached[0]
+
+    with open(data_file, "rb+") as file:
+        file.seek(-1, os.SEEK_END)
+        if file.read(1) not in (b"\n", b"\r"):
+            file.write(b"\r\n")
+    with open(data_file, newline="") as file:
+        return next(csv.reader(file), None)
+
+
+def _remember_aggregate_header(data_file, header):
+    stat = os.stat(data_file)
+    _aggregate_headers[data_file] = (header, (stat.st_size, stat.st_mtime_ns))
+
+
+def _rewrite_aggregate(data_file, existing_header, header, rows):
+    """Rewrite an aggregate under the union of both headers, swapping it in atomically."""
+    merged_header = existing_header + [column for column in header if column not in existing_header]
+    temp_file = data_file + ".tmp"
+    with open(data_file, newline="") as source, open(temp_file, mode="w", newline="") as target:
+        writer = csv.DictWriter(target, fieldnames=merged_header, restval="")
+        writer.writeheader()
+        writer.writerows(csv.DictReader(source))
+        writer.writerows(dict(zip(header, row)) for row in rows)
+    os.replace(temp_file, data_file)
+    print(f"Schema of {data_file} changed; rewrote it with columns {merged_header}")
+    return merged_header
+
+
+def append_rows_to_aggregate(data_file, header, rows):
+    """Append rows to an aggregate CSV without reading what is already there.
+
+    A missing file is created with `header`. If the file already has every
+    column of `header` (possibly in another order, or with columns no longer
+    written), the rows are mapped onto its header, with blanks for the missing
+    columns, and appended. Only a new column makes it rewrite the file once
+    under the union of both headers (the only case that costs more than the
+    new rows).
+    """
+    existing_header = _aggregate_header(data_file)
+    if existing_header is None:
+        with open(data_file, mode="w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(header)
+            writer.writerows(rows)
+    elif existing_header == header:
+        with open(data_file, mode="a", newline="") as file:
+            csv.writer(file).writerows(rows)
+    elif set(header) <= set(existing_header):
+        with open(data_file, mode="a", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=existing_header, restval="")
+            writer.writerows(dict(zip(header, row)) for row in rows)
+        header = existing_header
+    else:
+        header = _rewrite_aggregate(data_file, existing_header, header, rows)
+    _remember_aggregate_header(data_file, header)
+    print(f"Data aggregated into {data_file}")
+
+
+_match_store = None
+_match_store_lock = threading.Lock()
+
+def get_match_store():
+    """Return the shared match store, creating (and migrating) it on first use."""
+    global _match_store
+    with _match_store_lock:
+        if _match_store is None:
+            _match_store = MatchStore()
+        return _match_store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the DirectStrike Stats match store.")
+    parser.add_argument("--export-csv", action="store_true", help="Rewrite the aggregate CSVs from the store")
+    parser.add_argument("--rebuild-totals", action="store_true", help="Recompute the per-player lifetime totals")
+    parser.add_argument("--check-totals", action="store_true",
+                        help="Compare the lifetime totals with a full recomputation")
+    args = parser.parse_args()
+
+    store = get_match_store()
+    if args.export_csv:
+        store.export_csv()
+    if args.rebuild_totals:
+        store.rebuild_player_totals()
+    if args.check_totals:
+        mismatches = store.check_player_totals()
+        for player, column, stored, expected in mismatches:
+            print(f"{player}: {column} is {stored}, expected {expected}")
+        print(f"{len(mismatches)} mismatches in the per-player totals")
+        sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import glob
+import os
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+import history
+from store import MatchStore
+
+from test_store import HEADER, match_rows
+
+
+def frame(uuid, when, player="me"):
+    rows = match_rows(uuid, players=(player, "a", "b", "x", "y", "z"))
+    for row in rows:
+        row[HEADER.index("datetime")] = when
+    return pd.DataFrame(rows, columns=HEADER)
+
+
+def test_append_and_filtered_read(tmp_path):
+    folder = str(tmp_path)
+    history.append_history(frame("u1", "2024-05-01 20:00:00"), folder)
+    history.append_history(frame("u2", "2024-06-01 20:00:00"), folder)
+    history.append_history(frame("u3", "2024-06-02 20:00:00", player="other"), folder)
+
+    rows = history.read_history(["uuid", "player", "score"], players=["me"], folder=folder)
+    assert sorted(rows["uuid"]) == ["u1", "u2"]
+    assert rows["score"].dtype == "int64"
+
+    june = history.read_history(["uuid"], start="2024-06-01", players=["me"], folder=folder)
+    assert list(june["uuid"]) == ["u2"]
+
+    # Restricted to some files, as AggregateData does for new ones
+    new_files = [path for path in history.history_files(folder) if "2024-06" in path]
+    rows = history.read_history(["uuid"], players=["me"], folder=folder, paths=new_files)
+    assert list(rows["uuid"]) == ["u2"]
+
+
+def test_compaction_keeps_every_row(tmp_path):
+    folder = str(tmp_path)
+    for n in range(3):
+        history.append_history(frame(f"u{n}", "2024-05-01 20:00:00"), folder)
+    history.compact_history(folder)
+    history.append_history(frame("u3", "2024-05-02 20:00:00"), folder)
+    history.compact_history(folder)
+
+    assert [os.path.basename(path) for path in glob.glob(os.path.join(folder, "month=*", "*"))] == ["part-compacted.parquet"]
+    assert len(history.read_history(folder=folder)) == 24
+
+
+def test_stale_history_is_rebuilt_from_the_store(tmp_path):
+    folder = str(tmp_path / "history")
+    match_store = MatchStore(str(tmp_path / "matches.db"), (str(tmp_path / "none.csv"), str(tmp_path / "none2.csv")))
+    match_store.ingest(HEADER, match_rows("u1"))
+    history.ensure_history(match_store, folder)
+    match_store.ingest(HEADER, match_rows("u2", scores=(1,) * 6))
+    # As after a failed append: the store has u2, the history does not
+    history.mark_history_stale(folder)
+
+    history.ensure_history(match_store, folder)
+    assert sorted(set(history.read_history(["uuid"], folder=folder)["uuid"])) == ["u1", "u2"]
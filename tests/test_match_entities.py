@@ -0,0 +1,44 @@
+import pandas as pd
+
+from analytics import match_entities, chart_series
+
+
+def make_match(players, scores):
+    return pd.DataFrame({
+        "player": players,
+        "team": ["Team 1"] * 3 + ["Team 2"] * 3,
+        "score": scores,
+        "kills": [1] * 6,
+        "damage": [100] * 6,
+        "goldSpent": [10] * 6,
+    })
+
+
+def test_name_on_both_teams_is_counted_per_team():
+    # Unreadable names are stored as "", so the same name often appears on both teams
+    match = make_match(["me", "a", "", "x", "y", ""], [10, 20, 30, 40, 50, 60])
+    entities = match_entities(match, "me")
+
+    assert entities.at["Team", "Total Score"] == 60
+    assert entities.at["Opponents", "Total Score"] == 150
+    assert entities.at["Teammates", "Total Score"] == 50
+    # Teammates sorted by name: "" then "a"
+    assert entities.at["Teammate 1", "Total Score"] == 30
+    assert entities.at["Teammate 2", "Total Score"] == 20
+    assert entities.at["Opponent 1", "Total Score"] == 60
+    assert entities.at["Team", "Avg Score"] == 20
+
+
+def test_absent_player_is_seen_from_team_1():
+    match = make_match(["a", "b", "c", "x", "y", "z"], [10, 20, 30, 40, 50, 60])
+    entities = match_entities(match, "me")
+
+    assert entities.at["me", "Total Score"] == 0
+    assert pd.isna(entities.at["me", "Avg Score"])
+    assert entities.at["Team", "Total Score"] == 60
+    assert entities.at["Opponents", "Total Score"] == 150
+
+
+def test_chart_series_is_player_team_and_opponent_average_score():
+    match = make_match(["me", "a", "b", "x", "y", "z"], [10, 20, 30, 40, 50, 60])
+    assert chart_series(match_entities(match, "me"), "me") == (10.0, 20.0, 50.0)
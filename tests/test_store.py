@@ -0,0 +1,133 @@
+import os
+import csv
+import multiprocessing
+
+import pytest
+
+import store
+from store import MatchStore, normalize_stats, append_rows_to_aggregate
+
+HEADER = ["uuid", "row", "player", "level", "score", "kills", "damage", "goldSpent",
+          "team", "Victory/Defeat", "datetime", "invalidCells"]
+
+
+def match_rows(uuid, scores=(10, 20, 30, 40, 50, 60), players=("me", "a", "b", "x", "y", "z")):
+    return [
+        [uuid, f"Row {i + 1}", player, "5", str(score), "3", "1000", "200",
+         "Team 1" if i < 3 else "Team 2", "Victory" if i < 3 else "Defeat", "2024-05-01 20:00:00", ""]
+        for i, (player, score) in enumerate(zip(players, scores))
+    ]
+
+
+def write_csv(path, header, rows):
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+@pytest.fixture
+def new_store(tmp_path):
+    def make(legacy_rows=()):
+        player_csv = tmp_path / "aggregate_player_data.csv"
+        if legacy_rows:
+            write_csv(player_csv, HEADER[:-1], [row[:-1] for row in legacy_rows])
+        return MatchStore(str(tmp_path / "matches.db"), (str(player_csv), str(tmp_path / "middle.csv")))
+    return make
+
+
+def row_count(match_store):
+    return match_store._connection.execute("SELECT COUNT(*) FROM player_rows").fetchone()[0]
+
+
+def test_normalize_stats_fixes_ocr_slips_and_flags_unreadable_cells():
+    assert normalize_stats(" me ", ["1O", "1,234", "l2", "abc", "7"]) == ("me", [10, 1234, 12, 0, 7], "damage")
+    # Out of range, and no name read
+    assert normalize_stats("", ["500", "1", "1", "1", "1"]) == ("", [0, 1, 1, 1, 1], "player;level")
+
+
+def test_ingest_updates_totals(new_store):
+    match_store = new_store()
+    assert match_store.ingest(HEADER, match_rows("u1")) == {}
+    assert match_store.ingest(HEADER, match_rows("u2", scores=(1, 2, 3, 4, 5, 6))) == {}
+
+    totals = match_store.player_totals().set_index("player")
+    assert totals.at["me", "games"] == 2
+    assert totals.at["me", "score"] == 11
+    assert totals.at["me", "wins"] == 2
+    assert totals.at["x", "losses"] == 2
+    assert match_store.check_player_totals() == []
+
+
+def test_duplicate_match_is_skipped_and_keeps_data_version(new_store):
+    match_store = new_store()
+    match_store.ingest(HEADER, match_rows("u1"))
+    version = match_store.data_version()
+
+    assert match_store.ingest(HEADER, match_rows("u2")) == {"u2": "u1"}
+    assert row_count(match_store) == 6
+    assert match_store.data_version() == version
+    # Duplicates within one batch too
+    assert match_store.ingest(HEADER, match_rows("u3", scores=(1,) * 6) + match_rows("u4", scores=(1,) * 6)) == {"u4": "u3"}
+    assert match_store.check_player_totals() == []
+
+
+def test_reingest_of_migrated_rows_is_a_duplicate(new_store):
+    # Legacy CSV rows are fingerprinted after normalization, so the same match
+    # saved again (as text from output.csv) matches the stored integers
+    legacy = match_rows("u1", scores=(0, 20, 30, 40, 50, 60))
+    match_store = new_store(legacy)
+    assert row_count(match_store) == 6
+
+    assert match_store.ingest(HEADER, match_rows("u2", scores=(0, 20, 30, 40, 50, 60))) == {"u2": "u1"}
+    assert row_count(match_store) == 6
+
+
+def test_reopening_does_not_migrate_again(new_store):
+    new_store(match_rows("u1"))
+    assert row_count(new_store(match_rows("u1"))) == 6
+
+
+def _open_store(path, legacy_csvs):
+    return row_count(MatchStore(path, legacy_csvs))
+
+
+def test_concurrent_first_open_imports_legacy_csvs_once(tmp_path):
+    player_csv = tmp_path / "aggregate_player_data.csv"
+    rows = [row for m in range(200) for row in match_rows(f"u{m}", scores=(m,) * 6)]
+    write_csv(player_csv, HEADER[:-1], [row[:-1] for row in rows])
+    arguments = (str(tmp_path / "matches.db"), (str(player_csv), str(tmp_path / "middle.csv")))
+
+    with multiprocessing.get_context("spawn").Pool(4) as pool:
+        counts = pool.starmap(_open_store, [arguments] * 4)
+
+    assert counts == [len(rows)] * 4
+    match_store = MatchStore(*arguments)
+    assert match_store.player_totals().set_index("player").at["me", "games"] == 200
+    assert match_store.check_player_totals() == []
+
+
+def test_append_rows_to_aggregate_maps_onto_a_wider_header(tmp_path):
+    path = str(tmp_path / "aggregate.csv")
+    write_csv(path, ["b", "a", "extra"], [["1", "2", "x"]])
+    modified = os.stat(path).st_mtime_ns
+
+    append_rows_to_aggregate(path, ["a", "b"], [["3", "4"]])
+    with open(path, newline="") as file:
+        assert list(csv.reader(file)) == [["b", "a", "extra"], ["1", "2", "x"], ["4", "3", ""]]
+
+    # A new column rewrites the file once under the union of both headers
+    append_rows_to_aggregate(path, ["a", "new"], [["5", "n"]])
+    with open(path, newline="") as file:
+        lines = list(csv.reader(file))
+    assert lines[0] == ["b", "a", "extra", "new"]
+    assert lines[-1] == ["", "5", "", "n"]
+    assert os.stat(path).st_mtime_ns >= modified
+
+
+def test_append_rows_to_aggregate_creates_the_file(tmp_path):
+    path = str(tmp_path / "aggregate.csv")
+    append_rows_to_aggregate(path, ["a"], [["1"]])
+    append_rows_to_aggregate(path, ["a"], [["2"]])
+    with open(path, newline="") as file:
+        assert list(csv.reader(file)) == [["a"], ["1"], ["2"]]
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+from trends import PlayerTrends, TREND_METRICS, TREND_WINDOWS, CAREER, player_games, window_means, lttb
+
+
+def aggregate_rows(matches, seed=0):
+    rng = np.random.default_rng(seed)
+    when = pd.Timestamp("2024-01-01") + pd.to_timedelta(np.cumsum(rng.integers(10, 3000, matches)), unit="min")
+    rows = []
+    for m in range(matches):
+        for player in ("me", "a"):
+            rows.append({
+                "uuid": f"u{m}", "player": player, "datetime": when[m].strftime("%Y-%m-%d %H:%M:%S"),
+                "Victory/Defeat": rng.choice(["Victory", "Defeat", "Unknown"]),
+                "score": int(rng.integers(0, 5000)), "kills": int(rng.integers(0, 50)),
+                "damage": int(rng.integers(0, 100000)), "goldSpent": int(rng.integers(0, 10000)),
+            })
+    return pd.DataFrame(rows)
+
+
+def assert_matches_full_computation(trends, frame):
+    games = player_games(frame, "me")
+    for label, window in TREND_WINDOWS.items():
+        np.testing.assert_allclose(trends.windows[label].to_numpy(), window_means(games, window).to_numpy())
+    np.testing.assert_allclose(trends.windows[CAREER].to_numpy(), games[list(TREND_METRICS)].expanding().mean().to_numpy())
+
+
+def test_incremental_updates_match_a_full_computation():
+    frame = aggregate_rows(400)
+    trends = PlayerTrends("me")
+    for end in (0, 1, 150, 151, 600, 800):
+        trends.update(frame.iloc[:end])
+    assert len(trends.games) == 400
+    assert_matches_full_computation(trends, frame)
+
+
+def test_older_match_arriving_late_recomputes():
+    frame = aggregate_rows(300)
+    late = pd.concat([frame.iloc[:200], frame.iloc[400:], frame.iloc[200:400]], ignore_index=True)
+    trends = PlayerTrends("me")
+    trends.update(late.iloc[:400])
+    trends.update(late)
+    assert_matches_full_computation(trends, frame)
+
+
+def test_reload_starts_over():
+    frame = aggregate_rows(50)
+    trends = PlayerTrends("me")
+    trends.update(frame, reloads=0)
+    trends.update(frame, reloads=1)
+    assert len(trends.games) == 50
+
+
+def test_lttb_keeps_the_ends_and_the_requested_count():
+    x = np.arange(10000, dtype=float)
+    y = np.sin(x / 100)
+    y[5000] = 10
+    sampled_x, sampled_y = lttb(x, y, 500)
+    assert len(sampled_x) == 500
+    assert sampled_x[0] == 0 and sampled_x[-1] == 9999
+    assert 10 in sampled_y
+    assert lttb(x[:100], y[:100], 500)[0].shape == (100,)
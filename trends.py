@@ -0,0 +1,137 @@
+import numpy as np
+import pandas as pd
+
+# Stats followed over time; "win" is 1 for a Victory, 0 for a Defeat and missing when the outcome was not read
+TREND_METRICS = {"win": "Win Rate", "score": "Score", "kills": "Kills", "damage": "Damage", "goldSpent": "Gold"}
+# Moving windows, as a number of games or a calendar span; "Career" is the average over every game so far
+TREND_WINDOWS = {"Last 10 games": 10, "Last 50 games": 50, "Last 7 days": "7D", "Last 30 days": "30D"}
+CAREER = "Career"
+# Points handed to the chart per series; longer series are downsampled
+MAX_CHART_POINTS = 500
+
+
+def player_games(frame, player_name):
+    """One row per match of `player_name`, oldest first: datetime and the TREND_METRICS."""
+    rows = frame[frame["player"] == player_name].drop_duplicates("uuid")
+    outcome = rows["Victory/Defeat"].astype(str)
+    games = pd.DataFrame({
+        "datetime": pd.to_datetime(rows["datetime"], errors="coerce"),
+        "win": np.where(outcome == "Victory", 1.0, np.where(outcome == "Defeat", 0.0, np.nan)),
+    })
+    for column in TREND_METRICS:
+        if column != "win":
+            games[column] = pd.to_numeric(rows[column], errors="coerce").astype("float64").to_numpy()
+    games = games.dropna(subset=["datetime"])
+    return games.sort_values("datetime", kind="stable").reset_index(drop=True)
+
+
+def window_means(games, window):
+    """Moving average of every metric over `window` (a game count or a pandas offset like "30D")."""
+    metrics = games[list(TREND_METRICS)]
+    if isinstance(window, int):
+        return metrics.rolling(window, min_periods=1).mean()
+    return metrics.set_index(games["datetime"]).rolling(window, min_periods=1).mean().reset_index(drop=True)
+
+
+class PlayerTrends:
+    """Moving and career averages of one player's stats, kept up to date as matches arrive.
+
+    `update` is given the aggregate rows and how often they were re-read from
+    scratch (AggregateData.reloads). Rows past those already seen are new
+    matches: only their window values are computed, from the last games of
+    each window plus the new ones, and the career averages continue from
+    running sums. Everything is recomputed when the rows were re-read, the
+    player changed, or a new match is older than the newest known one (e.g. an
+    imported screenshot archive).
+    """
+
+    def __init__(self, player_name):
+        self.player_name = player_name
+        self.reset()
+
+    def reset(self, player_name=None):
+        if player_name is not None:
+            self.player_name = player_name
+        self.games = player_games(pd.DataFrame(columns=["uuid", "player", "datetime", "Victory/Defeat", *TREND_METRICS]), "")
+        self.windows = {}
+        self._sums = pd.Series(0.0, index=list(TREND_METRICS))
+        self._counts = pd.Series(0, index=list(TREND_METRICS))
+        self._rows_seen = 0
+        self._reloads = None
+
+    def update(self, frame, reloads=0):
+        """Bring the trends up to date with `frame`; returns the number of new games."""
+        if frame is None or frame.empty:
+            return 0
+        if reloads != self._reloads or len(frame) < self._rows_seen:
+            self.reset()
+            self._reloads = reloads
+        new_games = player_games(frame.iloc[self._rows_seen:], self.player_name)
+        self._rows_seen = len(frame)
+        if new_games.empty:
+            return 0
+        if not self.games.empty and new_games["datetime"].iloc[0] < self.games["datetime"].iloc[-1]:
+            games = pd.concat([self.games, new_games], ignore_index=True)
+            self.reset()
+            self._reloads = reloads
+            self._rows_seen = len(frame)
+            new_games = games.sort_values("datetime", kind="stable").reset_index(drop=True)
+        self._append(new_games)
+        return len(new_games)
+
+    def _append(self, new_games):
+        previous = self.games
+        windows = {}
+        for label, window in TREND_WINDOWS.items():
+            # Only the games that can fall in the window of a new game are needed
+            if isinstance(window, int):
+                context = previous.iloc[max(len(previous) - window + 1, 0):]
+            else:
+                context = previous[previous["datetime"] > new_games["datetime"].iloc[0] - pd.Timedelta(window)]
+            means = window_means(pd.concat([context, new_games], ignore_index=True), window)
+            windows[label] = means.iloc[len(context):].reset_index(drop=True)
+
+        metrics = new_games[list(TREND_METRICS)]
+        sums = metrics.fillna(0).cumsum() + self._sums
+        counts = metrics.notna().cumsum() + self._counts
+        windows[CAREER] = sums / counts.where(counts > 0)
+        self._sums = sums.iloc[-1]
+        self._counts = counts.iloc[-1]
+
+        self.games = pd.concat([previous, new_games], ignore_index=True) if not previous.empty else new_games
+        for label, values in windows.items():
+            existing = self.windows.get(label)
+            self.windows[label] = values if existing is None else pd.concat([existing, values], ignore_index=True)
+
+    def series(self, metric, window, max_points=MAX_CHART_POINTS):
+        """(x in ms since the epoch, y) of one metric's `window` average, downsampled for the chart."""
+        if self.games.empty or window not in self.windows:
+            return np.empty(0), np.empty(0)
+        x = self.games["datetime"].to_numpy("datetime64[ms]").astype("int64").astype("float64")
+        y = self.windows[window][metric].to_numpy(dtype="float64")
+        known = ~np.isnan(y)
+        return lttb(x[known], y[known], max_points)
+
+
+def lttb(x, y, threshold):
+    """Largest-Triangle-Three-Buckets: pick `threshold` points that keep the visual shape of (x, y)."""
+    count = len(x)
+    if threshold >= count or threshold < 3:
+        return x, y
+    # The first and last points are kept; the rest are split into threshold - 2 buckets
+    edges = np.linspace(1, count - 1, threshold - 1).astype(int)
+    selected = np.empty(threshold, dtype=int)
+    selected[0], selected[-1] = 0, count - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        # The next bucket's mean stands in for the point not yet chosen
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else count
+        next_x, next_y = x[end:next_end].mean(), y[end:next_end].mean()
+        areas = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+    return x[selected], y[selected]
@@ -1,5 +1,8 @@
 import sys
 import os
+import atexit
+import bisect
+import hashlib
 import pytesseract
 import csv
 import json
@@ -9,8 +12,21 @@ import pandas as pd
 from PIL import Image
 import cv2
 import numpy as np
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+from store import get_match_store, append_rows_to_aggregate, PLAYER_DATA_CSV, MIDDLE_CONTROL_CSV
+from history import ensure_history, append_history, mark_history_stale
+
+try:
+    # Optional in-process Tesseract binding; without it we shell out to tesseract.exe
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
 # Determine paths correctly
 if getattr(sys, 'frozen', False):
     # Running as a bundled executable
@@ -21,11 +37,15 @@ else:
     external_base_path = os.path.dirname(os.path.abspath(__file__))
     internal_base_path = external_base_path
 
-# Set Tesseract executable path relative to internal_base_path
+# Tesseract lives relative to internal_base_path; it is looked for when the OCR engine is first created
 tesseract_path = os.path.join(internal_base_path, "tesseract", "tesseract.exe")
-if not os.path.exists(tesseract_path):
-    raise FileNotFoundError(f"Tesseract executable not found at {tesseract_path}")
-pytesseract.pytesseract.tesseract_cmd = tesseract_path
+tessdata_path = os.path.join(internal_base_path, "tesseract", "tessdata")
+
+def configure_tesseract():
+    """Point pytesseract at the bundled tesseract.exe, failing if it is missing."""
+    if not os.path.exists(tesseract_path):
+        raise FileNotFoundError(f"Tesseract executable not found at {tesseract_path}")
+    pytesseract.pytesseract.tesseract_cmd = tesseract_path
 
 # Define DATA_FOLDER relative to external_base_path
 DATA_FOLDER = os.path.join(external_base_path, "data")
@@ -42,6 +62,9 @@ def load_config(config_file="config.json"):
         return json.load(f)
 
 def clear_session_folder(folder_path):
+    if _artifact_writer is not None:
+        # Let the previous capture's debug images land before the folder is removed
+        _artifact_writer.flush()
     if os.path.exists(folder_path):
         shutil.rmtree(folder_path)
     os.makedirs(folder_path)
@@ -56,36 +79,794 @@ def crop_area(image, start_x, end_x, top_y, bottom_y):
         int(bottom_y / 100 * height)
     ))
 
-def detect_top_left_corner(screenshot, template_path="team1_template.png", threshold=0.8):
-    template_full_path = os.path.join(external_base_path, template_path)
-    template = cv2.imread(template_full_path, cv2.IMREAD_COLOR)
-    if template is None:
-        raise FileNotFoundError(f"Template file not found: {template_full_path}")
+# Anchor search: each pyramid level halves the resolution of the coarse pass
+ANCHOR_PYRAMID_LEVELS = 2
+# A template scoring at least this much ends the search without trying the others
+ANCHOR_EARLY_STOP = 0.95
+# Where each template last matched, checked before any global search: name -> (x, y)
+_last_anchor_hits = {}
 
-    screenshot_cv = cv2.cvtColor(np.array(screenshot), cv2.COLOR_RGB2BGR)
-    result = cv2.matchTemplate(screenshot_cv, template, cv2.TM_CCOEFF_NORMED)
+def match_template_near(screenshot_cv, template, x, y, radius):
+    """Full-resolution TM_CCOEFF_NORMED search restricted to `radius` pixels around (x, y)."""
+    template_h, template_w = template.shape[:2]
+    screen_h, screen_w = screenshot_cv.shape[:2]
+    x0, y0 = max(0, x - radius), max(0, y - radius)
+    x1, y1 = min(screen_w, x + radius + template_w), min(screen_h, y + radius + template_h)
+    if x1 - x0 < template_w or y1 - y0 < template_h:
+        return 0.0, None
+    result = cv2.matchTemplate(screenshot_cv[y0:y1, x0:x1], template, cv2.TM_CCOEFF_NORMED)
     _, max_val, _, max_loc = cv2.minMaxLoc(result)
+    return max_val, (x0 + max_loc[0], y0 + max_loc[1])
 
-    if max_val < threshold:
-        raise ValueError("Top-left corner not detected. Check the template or screenshot.")
+def downsample_gray(image, levels=ANCHOR_PYRAMID_LEVELS):
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    for _ in range(levels):
+        image = cv2.pyrDown(image)
+    return image
 
-    return max_loc  # (x, y) of the detected top-left corner
+def locate_anchor(screenshot_cv, templates, threshold=0.8, levels=ANCHOR_PYRAMID_LEVELS,
+                  early_stop=ANCHOR_EARLY_STOP):
+    """Find the best-matching scoreboard anchor among `templates`.
 
-def extract_text_from_image(cropped_image, is_numeric=False):
-    gray_image = cropped_image.convert("L")  # grayscale
+    `templates` is a list of (name, BGR template) or (name, BGR template,
+    downsampled grayscale template) as kept by `TemplateBank`. For each template the last
+    known hit is re-scored first; failing that, the template is located on a
+    downsampled grayscale pyramid and the peak is refined in a small window at
+    full resolution. If the coarse peak does not pass `threshold` the full
+    screenshot is searched as before, so the reported score is always the
+    full-resolution `TM_CCOEFF_NORMED` value. Returns (location, score), with
+    location None when nothing passes `threshold`.
+    """
+    best_match_val = 0
+    best_match_loc = None
+    best_name = None
+    small_screenshot = None
+    scale = 2 ** levels
+
+    for name, template, *small_template in templates:
+        max_val, max_loc = 0.0, None
+        if name in _last_anchor_hits:
+            max_val, max_loc = match_template_near(screenshot_cv, template, *_last_anchor_hits[name], radius=2)
+
+        if max_val < early_stop:
+            if small_screenshot is None:
+                small_screenshot = downsample_gray(screenshot_cv, levels)
+            small_template = small_template[0] if small_template else downsample_gray(template, levels)
+            if small_template.shape[0] <= small_screenshot.shape[0] and small_template.shape[1] <= small_screenshot.shape[1]:
+                coarse = cv2.matchTemplate(small_screenshot, small_template, cv2.TM_CCOEFF_NORMED)
+                _, _, _, coarse_loc = cv2.minMaxLoc(coarse)
+                refined_val, refined_loc = match_template_near(
+                    screenshot_cv, template, coarse_loc[0] * scale, coarse_loc[1] * scale, radius=2 * scale
+                )
+                if refined_val > max_val:
+                    max_val, max_loc = refined_val, refined_loc
+
+        if max_val <= threshold:
+            # The coarse pass can miss on unusual captures; fall back to the exhaustive search
+            result = cv2.matchTemplate(screenshot_cv, template, cv2.TM_CCOEFF_NORMED)
+            _, max_val, _, max_loc = cv2.minMaxLoc(result)
+
+        print(f"Template '{name}' match value: {max_val}")
+        if max_val > threshold and max_val > best_match_val:
+            best_match_val = max_val
+            best_match_loc = max_loc
+            best_name = name
+        if best_match_val >= early_stop:
+            break
+
+    if best_match_loc is not None:
+        remember_anchor(best_name, best_match_loc)
+    return best_match_loc, best_match_val
+
+_last_anchor = None
+
+def remember_anchor(name, location):
+    """Record where the scoreboard anchor was found so the next capture can look there first."""
+    global _last_anchor
+    _last_anchor_hits[name] = location
+    _last_anchor = (name, location)
+
+def last_anchor():
+    """(template name, (x, y)) of the most recent anchor hit, or None."""
+    return _last_anchor
+
+# Team 1 anchor templates, one per race the scoreboard can be themed with
+RACE_TEMPLATE_FILENAMES = [
+    "team1_template_undead.png",
+    "team1_template_nightelf.png",
+    "team1_template_human.png",
+    "team1_template_orc.png",
+]
+
+class TemplateBank:
+    """Anchor templates decoded once and kept in memory.
+
+    Each template is stored in BGR with its downsampled grayscale pyramid level
+    precomputed, and is only re-read from disk when its file's mtime changes.
+    """
+
+    def __init__(self, filenames=RACE_TEMPLATE_FILENAMES, folder=external_base_path, levels=ANCHOR_PYRAMID_LEVELS):
+        self.filenames = list(filenames)
+        self.folder = folder
+        self.levels = levels
+        self._entries = {}  # filename -> (mtime, BGR template, downsampled grayscale template)
+        self._missing = set()
+        self._lock = threading.Lock()
+
+    def _load(self, filename):
+        path = os.path.join(self.folder, filename)
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            mtime = None
+        entry = self._entries.get(filename)
+        if entry is not None and entry[0] == mtime:
+            return entry
+
+        template = cv2.imread(path, cv2.IMREAD_COLOR) if mtime is not None else None
+        if template is None:
+            self._entries.pop(filename, None)
+            if filename not in self._missing:
+                print(f"Template file not found: {path}")
+                self._missing.add(filename)
+            return None
+        self._missing.discard(filename)
+        entry = (mtime, template, downsample_gray(template, self.levels))
+        self._entries[filename] = entry
+        print(f"Loaded template: {path}")
+        return entry
+
+    def templates(self, filenames=None):
+        """Return (name, BGR template, downsampled template) for every template that exists."""
+        with self._lock:
+            loaded = []
+            for filename in filenames or self.filenames:
+                entry = self._load(filename)
+                if entry is not None:
+                    loaded.append((filename, entry[1], entry[2]))
+            return loaded
+
+    def match(self, screenshot_cv, threshold=0.8, filenames=None):
+        """Match every bank template against one shared downsampled copy of the screenshot."""
+        return locate_anchor(screenshot_cv, self.templates(filenames), threshold, levels=self.levels)
+
+
+_template_bank = None
+
+def get_template_bank():
+    global _template_bank
+    if _template_bank is None:
+        _template_bank = TemplateBank()
+    return _template_bank
+
+def ocr_config(is_numeric=False):
     config = "--psm 6"
     if is_numeric:
         config += " outputbase digits"
-    return pytesseract.image_to_string(gray_image, config=config).strip()
+    return config
+
+def extract_text_from_image(cropped_image, is_numeric=False):
+    gray_image = cropped_image.convert("L")  # grayscale
+    return pytesseract.image_to_string(gray_image, config=ocr_config(is_numeric)).strip()
+
+# Blank margin (in pixels) placed around every cell when tiling a batch
+BATCH_TILE_PADDING = 12
+
+def tile_cells(cells, padding=BATCH_TILE_PADDING):
+    """Stack grayscale cells vertically into one composite image.
+
+    Returns the composite and the (top, bottom) y-range each cell occupies in it.
+    Every tile is padded with the median colour of its own border so the seams
+    between cells do not read as glyphs.
+    """
+    grays = [np.array(cell.convert("L")) for cell in cells]
+    width = max([g.shape[1] for g in grays] + [1]) + 2 * padding
+    tiles = []
+    spans = []
+    y = 0
+    for gray in grays:
+        height = gray.shape[0] + 2 * padding
+        if gray.size:
+            border = np.concatenate([gray[0, :], gray[-1, :], gray[:, 0], gray[:, -1]])
+            background = int(np.median(border))
+        else:
+            background = 255
+        tile = np.full((height, width), background, dtype=np.uint8)
+        tile[padding:padding + gray.shape[0], padding:padding + gray.shape[1]] = gray
+        tiles.append(tile)
+        spans.append((y, y + height))
+        y += height
+    return Image.fromarray(np.vstack(tiles)), spans
+
+def extract_text_batch(cells, is_numeric=False):
+    """OCR many cells with one Tesseract call per OCR config.
+
+    `is_numeric` is either a single flag or one flag per cell. Cells sharing a
+    config are tiled into a composite image, recognised with `image_to_data`,
+    and each word is mapped back to its cell by the centre of its bounding box.
+    Returns one string per cell, in input order, matching what
+    `extract_text_from_image` would return for that cell.
+    """
+    if isinstance(is_numeric, bool):
+        is_numeric = [is_numeric] * len(cells)
+    results = [""] * len(cells)
+
+    groups = {}
+    for index, numeric in enumerate(is_numeric):
+        groups.setdefault(ocr_config(numeric), []).append(index)
+
+    for config, indices in groups.items():
+        composite, spans = tile_cells([cells[i] for i in indices])
+        data = pytesseract.image_to_data(composite, config=config, output_type=pytesseract.Output.DICT)
+        span_tops = [top for top, _ in spans]
+
+        # cell -> {(block, par, line): [(left, word), ...]}, in recognition order
+        lines = [{} for _ in indices]
+        for i, word in enumerate(data["text"]):
+            word = word.strip()
+            if not word:
+                continue
+            centre_y = data["top"][i] + data["height"][i] / 2
+            cell = bisect.bisect_right(span_tops, centre_y) - 1
+            if cell < 0 or centre_y >= spans[cell][1]:
+                continue
+            line_key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+            lines[cell].setdefault(line_key, []).append((data["left"][i], word))
+
+        for cell, cell_lines in enumerate(lines):
+            text = "\n".join(
+                " ".join(word for _, word in sorted(words)) for words in cell_lines.values()
+            )
+            results[indices[cell]] = text.strip()
+
+    return results
+
+# Size every glyph is normalised to before correlation (width, height)
+GLYPH_SIZE = (16, 24)
+GLYPH_ATLAS_FILE = os.path.join(DATA_FOLDER, "glyph_atlas.npz")
+GLYPH_CHARACTERS = "0123456789:"
+# Column name -> file-name stem and output.csv header of the labelled crops in last_session
+GLYPH_LABEL_COLUMNS = {
+    "Level": "level",
+    "Score": "score",
+    "Kills": "kills",
+    "Damage Done": "damage",
+    "Gold Spent": "goldSpent",
+}
+
+def segment_glyphs(image):
+    """Split a single-line cell into glyphs and return one normalised vector per glyph.
+
+    The cell is binarised with Otsu (text is taken to be the minority class, so
+    light-on-dark and dark-on-light both work), split into connected components,
+    and components that overlap horizontally are merged so a ':' or a broken
+    stroke stays one glyph. Each glyph keeps the full line height, is scaled to
+    `GLYPH_SIZE` preserving its aspect ratio, and is returned zero-mean and
+    unit-norm so a dot product with the atlas is a correlation coefficient.
+    """
+    gray = np.asarray(image.convert("L") if isinstance(image, Image.Image) else image)
+    if gray.size == 0:
+        return np.empty((0, GLYPH_SIZE[0] * GLYPH_SIZE[1]), dtype=np.float32)
+    _, mask = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    if np.count_nonzero(mask) > mask.size / 2:
+        mask = 255 - mask
+
+    count, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+    boxes = sorted(
+        [x, y, x + w, y + h] for x, y, w, h, area in stats[1:count] if area >= 4
+    )
+    merged = []
+    for box in boxes:
+        if merged and box[0] < merged[-1][2]:
+            last = merged[-1]
+            merged[-1] = [last[0], min(last[1], box[1]), max(last[2], box[2]), max(last[3], box[3])]
+        else:
+            merged.append(box)
+    if not merged:
+        return np.empty((0, GLYPH_SIZE[0] * GLYPH_SIZE[1]), dtype=np.float32)
+
+    line_top = min(box[1] for box in merged)
+    line_bottom = max(box[3] for box in merged)
+    width, height = GLYPH_SIZE
+    scale = height / (line_bottom - line_top)
+    vectors = np.zeros((len(merged), height, width), dtype=np.float32)
+    for i, (x0, _, x1, _) in enumerate(merged):
+        glyph = mask[line_top:line_bottom, x0:x1]
+        glyph_width = min(width, max(1, round((x1 - x0) * scale)))
+        glyph = cv2.resize(glyph, (glyph_width, height), interpolation=cv2.INTER_AREA)
+        offset = (width - glyph_width) // 2
+        vectors[i, :, offset:offset + glyph_width] = glyph
+
+    vectors = vectors.reshape(len(merged), -1)
+    vectors -= vectors.mean(axis=1, keepdims=True)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+def collect_labelled_glyphs(session_folder=LAST_SESSION_FOLDER):
+    """Pair the numeric crops of a session with the text recorded for them.
+
+    Yields (character, glyph vector) for every crop whose glyph count matches
+    its label, using output.csv for the stat columns (except those the row lists
+    in invalidCells) and middle_control.csv for the MM:SS timers.
+    """
+    labelled = []
+    player_data_file = os.path.join(session_folder, "output.csv")
+    if os.path.exists(player_data_file):
+        with open(player_data_file, newline="") as file:
+            for i, row in enumerate(csv.DictReader(file)):
+                # Unreadable cells are stored as 0; their crops are not a picture of "0"
+                invalid = set(filter(None, (row.get("invalidCells") or "").split(";")))
+                for column_name, header in GLYPH_LABEL_COLUMNS.items():
+                    if header in invalid:
+                        continue
+                    crop = find_debug_artifact(session_folder, f"Row_{i+1}_{column_name.replace(' ', '_')}.png")
+                    labelled.append((crop, str(row.get(header, ""))))
+    middle_control_file = os.path.join(session_folder, "middle_control.csv")
+    if os.path.exists(middle_control_file):
+        with open(middle_control_file, newline="") as file:
+            for row in csv.DictReader(file):
+                crop = find_debug_artifact(session_folder, f"Middle_Control_{row['team'].replace(' ', '_')}.png")
+                labelled.append((crop, row["timeMMSS"]))
+
+    for crop, label in labelled:
+        if not label or any(char not in GLYPH_CHARACTERS for char in label) or crop is None:
+            continue
+        vectors = segment_glyphs(Image.open(crop))
+        if len(vectors) != len(label):
+            continue
+        yield from zip(label, vectors)
+
+def build_glyph_atlas(session_folder=LAST_SESSION_FOLDER, atlas_file=GLYPH_ATLAS_FILE):
+    """Fold the labelled crops of a session into the persisted digit atlas.
+
+    The atlas file keeps per-character sums and counts, so running this after
+    every launch keeps refining the mean glyph of each character. Sessions are
+    remembered by UUID and only ever learned once.
+    """
+    dimensions = GLYPH_SIZE[0] * GLYPH_SIZE[1]
+    sums = np.zeros((len(GLYPH_CHARACTERS), dimensions), dtype=np.float64)
+    counts = np.zeros(len(GLYPH_CHARACTERS), dtype=np.int64)
+    sessions = np.array([], dtype=str)
+    if os.path.exists(atlas_file):
+        with np.load(atlas_file) as stored:
+            if stored["sums"].shape == sums.shape:
+                sums, counts = stored["sums"], stored["counts"]
+                sessions = stored["sessions"] if "sessions" in stored else sessions
+
+    session_uuid = None
+    player_data_file = os.path.join(session_folder, "output.csv")
+    if os.path.exists(player_data_file):
+        with open(player_data_file, newline="") as file:
+            session_uuid = next(csv.DictReader(file), {}).get("uuid")
+
+    added = 0
+    if session_uuid not in sessions:
+        for char, vector in collect_labelled_glyphs(session_folder):
+            index = GLYPH_CHARACTERS.index(char)
+            sums[index] += vector
+            counts[index] += 1
+            added += 1
+
+    if added:
+        sessions = np.append(sessions, session_uuid)
+        os.makedirs(os.path.dirname(atlas_file), exist_ok=True)
+        np.savez_compressed(atlas_file, sums=sums, counts=counts, sessions=sessions)
+    print(f"Glyph atlas updated with {added} glyphs; characters known: "
+          f"{''.join(c for c, n in zip(GLYPH_CHARACTERS, counts) if n) or 'none'}")
+    return sums, counts
+
+class GlyphClassifier:
+    """Reads numeric cells by correlating their glyphs against a digit atlas.
+
+    The scoreboard always renders numbers in the same font, so a nearest-template
+    match is enough; a cell is only answered when every one of its glyphs
+    correlates above `min_confidence`, otherwise `classify` returns None for it
+    and the caller falls back to Tesseract.
+    """
+
+    def __init__(self, sums, counts, min_confidence=0.85):
+        known = counts > 0
+        self.characters = np.array(list(GLYPH_CHARACTERS))[known]
+        atlas = sums[known] / counts[known, None]
+        atlas -= atlas.mean(axis=1, keepdims=True)
+        norms = np.linalg.norm(atlas, axis=1, keepdims=True)
+        self.atlas = (atlas / np.where(norms == 0, 1, norms)).astype(np.float32)
+        self.min_confidence = min_confidence
+
+    @classmethod
+    def load(cls, session_folder=LAST_SESSION_FOLDER, atlas_file=GLYPH_ATLAS_FILE, min_confidence=0.85):
+        sums, counts = build_glyph_atlas(session_folder, atlas_file)
+        if not counts.any():
+            return None
+        return cls(sums, counts, min_confidence)
+
+    def classify(self, images):
+        """Return the text of each image, or None where the atlas is not confident."""
+        vectors = [segment_glyphs(image) for image in images]
+        results = [None] * len(images)
+        if not any(len(v) for v in vectors):
+            return results
+        # One matrix product scores every glyph of every cell against the whole atlas
+        scores = np.vstack([v for v in vectors if len(v)]) @ self.atlas.T
+        best = scores.argmax(axis=1)
+        confidence = scores[np.arange(len(best)), best]
+        start = 0
+        for i, cell_vectors in enumerate(vectors):
+            end = start + len(cell_vectors)
+            if end > start and confidence[start:end].min() >= self.min_confidence:
+                results[i] = "".join(self.characters[best[start:end]])
+            start = end
+        return results
+
+OCR_CACHE_FILE = os.path.join(DATA_FOLDER, "ocr_cache.json")
+# config.json sections that decide what a cell crop contains
+LAYOUT_CONFIG_KEYS = ["rows", "columns", "middle_control", "victory_defeat_position"]
+
+def ocr_cache_fingerprint(config):
+    """Identify the Tesseract build and scoreboard layout the cached results were produced with."""
+    try:
+        tesseract_version = str(pytesseract.get_tesseract_version())
+    except Exception:
+        tesseract_version = "unknown"
+    layout = json.dumps({key: config.get(key) for key in LAYOUT_CONFIG_KEYS}, sort_keys=True)
+    return "|".join([
+        tesseract_version,
+        hashlib.sha1(layout.encode("utf-8")).hexdigest(),
+        str(config.get("ocr_cache_version", 1)),
+    ])
+
+class OcrCache:
+    """Persistent, size-bounded LRU of recognised text keyed by cell content.
+
+    Keys hash the exact grayscale pixels of a cell together with the OCR mode and
+    Tesseract config, so a hit is guaranteed to be what recognition would return.
+    The file is discarded when its fingerprint (Tesseract version, scoreboard
+    layout in config.json, `ocr_cache_version`) no longer matches.
+    """
+
+    def __init__(self, path=OCR_CACHE_FILE, max_entries=5000, fingerprint=""):
+        self.path = path
+        self.max_entries = max_entries
+        self.fingerprint = fingerprint
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._dirty = False
+        self._lock = threading.Lock()
+        self.load()
+
+    @staticmethod
+    def key(image, mode):
+        gray = np.ascontiguousarray(image.convert("L") if isinstance(image, Image.Image) else image)
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{mode}|{ocr_config(mode == 'numeric')}|{gray.shape}".encode("utf-8"))
+        digest.update(gray.tobytes())
+        return digest.hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            text = self.entries.get(key)
+            if text is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return text
+
+    def put(self, key, text):
+        with self._lock:
+            self.entries[key] = text
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+            self._dirty = True
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r") as f:
+                stored = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable OCR cache {self.path}: {e}")
+            return
+        if stored.get("fingerprint") != self.fingerprint:
+            print("OCR cache invalidated (Tesseract version or layout changed).")
+            self._dirty = True
+            return
+        # Stored oldest first, so the LRU order survives a restart
+        self.entries = OrderedDict(stored.get("entries", [])[-self.max_entries:])
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            payload = {"fingerprint": self.fingerprint, "entries": list(self.entries.items())}
+            self._dirty = False
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump(payload, f)
+        os.replace(temp_path, self.path)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        hit_rate = self.hits / lookups if lookups else 0.0
+        return (f"OCR cache: {self.hits} hits, {self.misses} misses ({hit_rate:.0%}), "
+                f"{self.evictions} evictions, {len(self.entries)}/{self.max_entries} entries")
+
+# Equivalent of Tesseract's "digits" config file used by `outputbase digits`
+DIGITS_WHITELIST = "0123456789-."
+
+class OcrEngine:
+    """Long-lived OCR engine that keeps the Tesseract language data loaded.
+
+    When `tesserocr` is installed the engine holds resident `PyTessBaseAPI`
+    handles, so recognising a cell costs no process launch and no traineddata
+    reload. Otherwise it falls back to the pytesseract subprocess path, batching
+    cells through `extract_text_batch` to keep the number of launches down.
+
+    Cells are independent, so with resident handles a batch is spread over
+    `max_workers` threads (one API handle per worker); on the subprocess path
+    each mode's cells are one composite and the modes are read in parallel, so
+    a capture launches at most one Tesseract per mode. Results always
+    come back in input order, and the first failing cell's exception is raised
+    just as it would be on the serial path.
+    """
+
+    def __init__(self, lang="eng", backend="auto", batched=True, max_workers=None, glyph_classifier=None, cache=None):
+        self.lang = lang
+        self.batched = batched
+        self.glyph_classifier = glyph_classifier
+        self.cache = cache
+        self.max_workers = max(1, max_workers or os.cpu_count() or 1)
+        self.backend = "subprocess"
+        self._apis = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ocr")
+        if self.max_workers > 1:
+            # Parallelism comes from our workers; stop each Tesseract from spawning its own threads too
+            os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+        if backend != "subprocess" and tesserocr is not None:
+            try:
+                for _ in range(self.max_workers):
+                    self._apis.put(tesserocr.PyTessBaseAPI(
+                        path=tessdata_path + os.sep, lang=lang, psm=tesserocr.PSM.SINGLE_BLOCK
+                    ))
+                self.backend = "tesserocr"
+            except RuntimeError as e:
+                print(f"tesserocr could not be initialised ({e}), using the Tesseract executable")
+                while not self._apis.empty():
+                    self._apis.get().End()
+        print(f"OCR engine ready (backend: {self.backend}, workers: {self.max_workers})")
+
+    def recognize(self, images, mode="text", progress=None):
+        """Recognise a batch of images.
+
+        `mode` is "text", "numeric", "time" (an MM:SS timer) or one mode per image.
+        Cells already in the OCR cache are answered from it. Numeric and time
+        cells are then read by the glyph classifier when one is loaded; only the
+        cells it is not confident about go to Tesseract. `progress(done, total)`
+        is called as results come in.
+        """
+        images = list(images)
+        modes = [mode] * len(images) if isinstance(mode, str) else list(mode)
+        results = [None] * len(images)
+        keys = []
+        if self.cache is not None:
+            keys = [OcrCache.key(image, m) for image, m in zip(images, modes)]
+            results = [self.cache.get(key) for key in keys]
+        uncached = [i for i, text in enumerate(results) if text is None]
+
+        if self.glyph_classifier is not None:
+            glyph_indices = [i for i in uncached if modes[i] in ("numeric", "time")]
+            classified = self.glyph_classifier.classify([images[i] for i in glyph_indices])
+            for i, text in zip(glyph_indices, classified):
+                results[i] = text
+
+        pending = [i for i, text in enumerate(results) if text is None]
+        on_result = None
+        if progress is not None:
+            resolved = len(images) - len(pending)
+            progress(resolved, len(images))
+            on_result = lambda count: progress(resolved + count, len(images))
+        if pending:
+            # Timers were always read with the plain text config
+            texts = self._recognize_tesseract(
+                [images[i] for i in pending], ["numeric" if modes[i] == "numeric" else "text" for i in pending],
+                on_result,
+            )
+            for i, text in zip(pending, texts):
+                results[i] = text
+
+        if self.cache is not None:
+            for i in uncached:
+                self.cache.put(keys[i], results[i])
+            self.cache.save()
+            print(self.cache.stats())
+        return results
+
+    def _recognize_tesseract(self, images, modes, on_result=None):
+        """Read images with Tesseract; `on_result(count)` reports how many are done so far."""
+        if self.backend == "tesserocr":
+            return self._collect(self._executor.map(self._recognize_resident, images, modes), on_result)
+
+        is_numeric = [m == "numeric" for m in modes]
+        if not self.batched:
+            return self._collect(self._executor.map(
+                lambda image, numeric: extract_text_from_image(image, is_numeric=numeric), images, is_numeric
+            ), on_result)
+
+        # One composite and one Tesseract launch per mode, the modes read in parallel;
+        # splitting further would cost a process launch per extra chunk
+        groups = {}
+        for index, numeric in enumerate(is_numeric):
+            groups.setdefault(numeric, []).append(index)
+        results = [""] * len(images)
+        done = 0
+        batches = self._executor.map(
+            lambda group: extract_text_batch([images[i] for i in group[1]], group[0]), groups.items()
+        )
+        for indices, texts in zip(groups.values(), batches):
+            for i, text in zip(indices, texts):
+                results[i] = text
+            done += len(indices)
+            if on_result is not None:
+                on_result(done)
+        return results
+
+    @staticmethod
+    def _collect(texts, on_result):
+        """List the results of an executor map, reporting each as it arrives."""
+        results = []
+        for text in texts:
+            results.append(text)
+            if on_result is not None:
+                on_result(len(results))
+        return results
+
+    def _recognize_resident(self, image, mode):
+        api = self._apis.get()
+        try:
+            api.SetVariable("tessedit_char_whitelist", DIGITS_WHITELIST if mode == "numeric" else "")
+            api.SetImage(image.convert("L"))
+            return api.GetUTF8Text().strip()
+        finally:
+            self._apis.put(api)
+
+    def warm_up(self):
+        """Run a throwaway recognition so the first real capture does not pay for loading."""
+        blank = Image.new("L", (64, 24), 255)
+        # Straight to Tesseract: a cache hit here would skip the very loading we want done now
+        self._recognize_tesseract([blank, blank], ["text", "numeric"])
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        while not self._apis.empty():
+            self._apis.get().End()
+
+
+_ocr_engine = None
+_ocr_engine_lock = threading.Lock()
+
+def get_ocr_engine(config=None):
+    """Return the shared OCR engine, creating it on first use."""
+    global _ocr_engine
+    with _ocr_engine_lock:
+        if _ocr_engine is None:
+            configure_tesseract()
+            config = config or load_config()
+            glyph_classifier = None
+            if config.get("glyph_classifier", True):
+                glyph_classifier = GlyphClassifier.load(
+                    min_confidence=config.get("glyph_min_confidence", 0.85)
+                )
+            cache = None
+            if config.get("ocr_cache", True):
+                cache = OcrCache(
+                    max_entries=config.get("ocr_cache_size", 5000),
+                    fingerprint=ocr_cache_fingerprint(config),
+                )
+            _ocr_engine = OcrEngine(
+                backend=config.get("ocr_backend", "auto"),
+                batched=config.get("batch_ocr", True),
+                max_workers=config.get("max_workers"),
+                glyph_classifier=glyph_classifier,
+                cache=cache,
+            )
+        return _ocr_engine
+
+def warm_up_ocr_engine():
+    engine = get_ocr_engine()
+    try:
+        engine.warm_up()
+        print("OCR engine warmed up.")
+    except Exception as e:
+        print(f"OCR warm-up failed: {e}")
+
+# "off" writes nothing, "compressed" writes JPEGs, "full" writes lossless PNGs
+DEBUG_ARTIFACT_MODES = ("off", "compressed", "full")
+
+class DebugArtifactWriter:
+    """Encodes and writes debug images on a background thread.
+
+    Capture and OCR only enqueue the image, so PNG/JPEG encoding never sits on
+    the hot path. `flush` waits for everything queued so far to reach disk.
+    """
+
+    def __init__(self, mode="full"):
+        self.mode = mode
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="debug-artifacts", daemon=True)
+        self._thread.start()
+
+    def submit(self, image, output_folder, file_name):
+        if self.mode == "off":
+            return
+        self._queue.put((image, output_folder, file_name, self.mode))
+
+    def flush(self):
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            image, output_folder, file_name, mode = self._queue.get()
+            try:
+                self._write(image, output_folder, file_name, mode)
+            except Exception as e:
+                print(f"Failed to save debug image {file_name}: {e}")
+            finally:
+                self._queue.task_done()
+
+    @staticmethod
+    def _write(image, output_folder, file_name, mode):
+        if isinstance(image, np.ndarray):
+            if image.ndim == 3:
+                image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+            image = Image.fromarray(image)
+        os.makedirs(output_folder, exist_ok=True)
+        if mode == "compressed":
+            file_path = os.path.join(output_folder, os.path.splitext(file_name)[0] + ".jpg")
+            image.convert("RGB").save(file_path, quality=85)
+        else:
+            file_path = os.path.join(output_folder, file_name)
+            image.save(file_path)
+        print(f"Saved cropped image: {file_path}")
+
+
+_artifact_writer = None
+
+def get_artifact_writer():
+    global _artifact_writer
+    if _artifact_writer is None:
+        _artifact_writer = DebugArtifactWriter()
+        atexit.register(_artifact_writer.flush)
+    return _artifact_writer
+
+def configure_debug_artifacts(mode):
+    if mode not in DEBUG_ARTIFACT_MODES:
+        print(f"Unknown debug_artifacts mode '{mode}', using 'full'")
+        mode = "full"
+    get_artifact_writer().mode = mode
 
 def save_cropped_image(image, output_folder, file_name):
-    os.makedirs(output_folder, exist_ok=True)
-    file_path = os.path.join(output_folder, file_name)
-    image.save(file_path)
-    print(f"Saved cropped image: {file_path}")
+    """Queue a debug image (PIL, or a BGR/grayscale array) for the background writer."""
+    get_artifact_writer().submit(image, output_folder, file_name)
+
+def find_debug_artifact(output_folder, file_name):
+    """Path of a saved debug image in whichever format it was written, or None."""
+    stem = os.path.splitext(file_name)[0]
+    for extension in (".png", ".jpg"):
+        file_path = os.path.join(output_folder, stem + extension)
+        if os.path.exists(file_path):
+            return file_path
+    return None
 
-def process_middle_control(image, middle_control, output_folder, uuid_str):
-    middle_control_data = []
+def crop_middle_control(image, middle_control, output_folder):
+    """Crop (and save for debugging) each team's middle-control timer."""
+    cells = []
     for team, coords in middle_control.items():
         cropped_team_area = crop_area(
             image,
@@ -99,35 +880,80 @@ def process_middle_control(image, middle_control, output_folder, uuid_str):
             output_folder, 
             f"Middle_Control_{team.replace(' ', '_')}.png"
         )
-        extracted_time = extract_text_from_image(cropped_team_area).strip()
-        if ":" not in extracted_time:
-            extracted_time = "00:00"
-        try:
-            minutes, seconds = map(int, extracted_time.split(":"))
-            middle_control_seconds = minutes * 60 + seconds
-        except ValueError:
-            extracted_time = "00:00"
-            middle_control_seconds = 0
-        middle_control_data.append([uuid_str, team, extracted_time, middle_control_seconds])
-        print(f"Middle Control for {team}: {extracted_time} ({middle_control_seconds} seconds)")
-    return middle_control_data
-
-def append_to_aggregate(data_file, new_data_file):
-    # Read existing aggregate data if available
+        cells.append((team, cropped_team_area))
+    return cells
+
+def parse_middle_control(team, extracted_time, uuid_str):
+    extracted_time = extracted_time.strip()
+    if ":" not in extracted_time:
+        extracted_time = "00:00"
     try:
-        aggregate_data = pd.read_csv(data_file)
-    except FileNotFoundError:
-        aggregate_data = pd.DataFrame()
+        minutes, seconds = map(int, extracted_time.split(":"))
+        middle_control_seconds = minutes * 60 + seconds
+    except ValueError:
+        extracted_time = "00:00"
+        middle_control_seconds = 0
+    print(f"Middle Control for {team}: {extracted_time} ({middle_control_seconds} seconds)")
+    return [uuid_str, team, extracted_time, middle_control_seconds]
+
+def scoreboard_hash(cells, threshold=128):
+    """SHA-1 of the scoreboard's cells at full resolution, as hex.
+
+    Each cell crop is thresholded to black and white first, so repeat grabs of
+    the same static scoreboard hash identically while any differing digit or
+    name changes the hash. Captures that differ slightly are still caught by
+    the content hash of their rows after OCR.
+    """
+    digest = hashlib.sha1()
+    for cell in cells:
+        pixels = np.asarray(cell.convert("L") if isinstance(cell, Image.Image) else cell)
+        digest.update(np.array(pixels.shape, dtype=np.int32).tobytes())
+        digest.update(np.packbits(pixels >= threshold).tobytes())
+    return digest.hexdigest()
+
+def _drop_matches(header, rows, uuids):
+    """Rows whose uuid is not in `uuids`."""
+    if not uuids or header is None or "uuid" not in header:
+        return rows
+    uuid_index = header.index("uuid")
+    return [row for row in rows if row[uuid_index] not in uuids]
 
-    # Read new data
-    new_data = pd.read_csv(new_data_file)
+def read_csv_rows(path):
+    """(header, rows) of a CSV file, every value as text."""
+    with open(path, newline="") as file:
+        reader = csv.reader(file)
+        return next(reader, None), list(reader)
 
-    # Append new data to the aggregate
-    aggregate_data = pd.concat([aggregate_data, new_data], ignore_index=True)
+def frame_rows(frame):
+    """(header, rows) of a DataFrame, with missing values as empty strings like in the CSVs."""
+    return list(frame.columns), frame.astype(object).where(frame.notna(), "").values.tolist()
+
+def save_match_rows(player_header, player_rows, middle_control_header, middle_control_rows, image_hashes=None):
+    """Store matches in the match store in one transaction, then append them to the history and CSV exports.
+
+    Matches the store already holds are left out everywhere; returns
+    {skipped uuid: uuid of the stored copy}.
+    """
+    store = get_match_store()
+    # Seeded before the new rows go in, so they are not written twice
+    ensure_history(store)
+    skipped = store.ingest(player_header, player_rows, middle_control_header, middle_control_rows, image_hashes)
+    player_rows = _drop_matches(player_header, player_rows, skipped)
+    middle_control_rows = _drop_matches(middle_control_header, middle_control_rows, skipped)
+    if player_rows:
+        try:
+            append_history(pd.DataFrame(player_rows, columns=player_header))
+        except Exception as e:
+            # The store already has the rows; rebuild the history from it on the next ensure_history
+            print(f"Could not append to the history, it will be rebuilt from the match store: {e}")
+            mark_history_stale()
+    append_rows_to_aggregate(PLAYER_DATA_CSV, player_header, player_rows)
+    append_rows_to_aggregate(MIDDLE_CONTROL_CSV, middle_control_header, middle_control_rows)
+    return skipped
 
-    # Save back to the aggregate file
-    aggregate_data.to_csv(data_file, index=False)
-    print(f"Data aggregated into {data_file}")
+def append_session_to_aggregate(player_data_file, middle_control_file, image_hashes=None):
+    """Ingest one session's output.csv and middle_control.csv."""
+    return save_match_rows(*read_csv_rows(player_data_file), *read_csv_rows(middle_control_file), image_hashes)
 
 def save_middle_control_to_csv(data, output_file):
     with open(output_file, mode="w", newline="") as file:
@@ -137,15 +963,15 @@ def save_middle_control_to_csv(data, output_file):
     print(f"Middle control data saved to {output_file}")
 
 def save_to_csv(data, output_file, uuid_str):
-    # Data is expected as a list of lists: [row_name, player_name, level, score, kills, damage, goldSpent, team, game_outcome, datetime]
+    # Data is expected as a list of lists: [row_name, player_name, level, score, kills, damage, goldSpent, team, game_outcome, datetime, invalidCells]
     with open(output_file, mode="w", newline="") as file:
         writer = csv.writer(file)
-        writer.writerow(["uuid", "row", "player", "level", "score", "kills", "damage", "goldSpent", "team", "Victory/Defeat", "datetime"])
+        writer.writerow(["uuid", "row", "player", "level", "score", "kills", "damage", "goldSpent", "team", "Victory/Defeat", "datetime", "invalidCells"])
         for row in data:
             writer.writerow([uuid_str] + row)
     print(f"Data saved to {output_file}")
 
-def detect_victory_or_defeat(image, victory_position):
+def crop_victory_defeat_area(image, victory_position):
     # victory_position is a dict with "start_x", "start_y", "end_x", "end_y"
     cropped_victory_area = image.crop((
         int(victory_position["start_x"]),
@@ -154,10 +980,11 @@ def detect_victory_or_defeat(image, victory_position):
         int(victory_position["end_y"])
     ))
 
-    victory_defeat_path = os.path.join(external_base_path, "victory_defeat_area.png")
-    cropped_victory_area.save(victory_defeat_path)
+    save_cropped_image(cropped_victory_area, external_base_path, "victory_defeat_area.png")
+    return cropped_victory_area
 
-    result_text = extract_text_from_image(cropped_victory_area).strip().lower()
+def parse_game_outcome(result_text):
+    result_text = result_text.strip().lower()
     if "victory" in result_text:
         return "Victory"
     elif "defeat" in result_text: